@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: server-side CPU per ingested log as the number of viewers grows.
+
+Each record is serialized once in LogHub.publish and the same SSE frame
+bytes are handed to every subscriber, so a viewer costs a deque append
+and pop instead of a json.dumps. That cost is small but not zero:
+"publish" is the time spent in LogHub.publish, which still appends the
+frame to every subscriber, so it grows with the number of viewers (on
+the machine this was written on, from about 30 to about 140 us per record
+between 1 and 100 viewers). "drain" is the viewers' stream generators
+taking the frames back out. For comparison, the "per-viewer encode"
+column re-runs the old scheme, where every viewer's stream generator
+serialized each record itself.
+
+Usage:
+    python benchmarks/bench_fanout.py [records]
+"""
+
+import json
+import sys
+import time
+from queue import Queue
+
+from logan.hub import LogHub, Subscriber
+
+
+def _record(i):
+    return {
+        "timestamp": "2024-01-01T12:00:00.000000",
+        "type": "debug",
+        "message": f"Batch processing item {i}/1000",
+        "namespace": "bench",
+        "callstack": [
+            {"file": "/srv/app/handlers/batch.py", "line": 120 + depth, "function": f"handler_{depth}"}
+            for depth in range(20)
+        ],
+        "exception": None,
+    }
+
+
+def bench_shared_frames(records, viewers, batch_size=100):
+    hub = LogHub()
+    subscribers = [Subscriber() for _ in range(viewers)]
+    for subscriber in subscribers:
+        hub.subscribe(subscriber)
+
+    publish = drain = 0.0
+    for offset in range(0, len(records), batch_size):
+        start = time.process_time()
+        hub.publish(records[offset:offset + batch_size])
+        published = time.process_time()
+        for subscriber in subscribers:
+            subscriber.pop_all()
+        publish += published - start
+        drain += time.process_time() - published
+    return publish, drain
+
+
+def bench_per_viewer_encode(records, viewers):
+    queues = [Queue() for _ in range(viewers)]
+
+    start = time.process_time()
+    for log_data in records:
+        for client_queue in queues:
+            client_queue.put(log_data)
+        for client_queue in queues:
+            json.dumps(client_queue.get_nowait())
+    return time.process_time() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    records = [_record(i) for i in range(count)]
+
+    print(f"{count} records, CPU microseconds per record")
+    print(f"{'viewers':>8} {'publish':>10} {'drain':>10} {'per-viewer encode':>18}")
+    for viewers in (1, 5, 10, 25, 50, 100):
+        publish, drain = bench_shared_frames(records, viewers)
+        per_viewer = bench_per_viewer_encode(records, viewers) / count * 1e6
+        print(f"{viewers:>8} {publish / count * 1e6:>10.1f} {drain / count * 1e6:>10.1f} {per_viewer:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
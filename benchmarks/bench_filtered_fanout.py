@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of routing one record to filtered viewers as their number grows.
+
+Every viewer watches one namespace out of fifty, at warning level and
+above. The "index" column is SubscriptionIndex.match as used by
+LogHub.publish; the "test every filter" column is the naive broadcast
+loop that calls StreamFilter.matches for each viewer.
+
+Usage:
+    python benchmarks/bench_filtered_fanout.py [records]
+"""
+
+import sys
+import time
+
+from logan.filters import StreamFilter, SubscriptionIndex
+from logan.hub import Subscriber
+
+NAMESPACES = [f"service_{i}" for i in range(50)]
+TYPES = ["debug", "info", "warning", "error"]
+
+
+def _records(count):
+    return [{"namespace": NAMESPACES[i % len(NAMESPACES)], "type": TYPES[i % len(TYPES)], "message": f"event {i}"}
+            for i in range(count)]
+
+
+def _subscribers(viewers):
+    return [Subscriber(filter=StreamFilter(namespaces=[NAMESPACES[i % len(NAMESPACES)]], min_level="warning"))
+            for i in range(viewers)]
+
+
+def bench_index(records, subscribers):
+    index = SubscriptionIndex()
+    for subscriber in subscribers:
+        index.add(subscriber)
+
+    start = time.process_time()
+    for record in records:
+        index.match(record)
+    return time.process_time() - start
+
+
+def bench_naive(records, subscribers):
+    start = time.process_time()
+    for record in records:
+        [subscriber for subscriber in subscribers if subscriber.filter.matches(record)]
+    return time.process_time() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    records = _records(count)
+
+    print(f"{count} records, CPU microseconds per record")
+    print(f"{'viewers':>8} {'index':>8} {'test every filter':>18}")
+    for viewers in (1, 10, 50, 100, 250, 500):
+        subscribers = _subscribers(viewers)
+        indexed = bench_index(records, subscribers) / count * 1e6
+        naive = bench_naive(records, subscribers) / count * 1e6
+        print(f"{viewers:>8} {indexed:>8.2f} {naive:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark: how long ``import logan`` takes, from ``python -X importtime``.
+
+Each run is a fresh interpreter. Reports the median cumulative import time
+of the logan package, the slowest modules it pulled in, and whether any of
+the server or HTTP stacks (which should load only when a server is started)
+came along.
+
+Usage:
+    python benchmarks/bench_import.py [runs]
+"""
+
+import statistics
+import subprocess
+import sys
+
+HEAVY = ("flask", "waitress", "requests", "urllib3", "logan.server", "logan.transport")
+
+SCRIPT = "import logan, sys; print(','.join(name for name in {heavy!r} if name in sys.modules))"
+
+
+def _import_times(stderr):
+    """Parse ``-X importtime`` lines into ``(module, self_us, cumulative_us)``."""
+    times = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def run_once():
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", SCRIPT.format(heavy=HEAVY)],
+                            capture_output=True, text=True, check=True)
+    times = _import_times(result.stderr)
+    total = next(cumulative for name, _, cumulative in reversed(times) if name == "logan")
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return total, times, loaded
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    results = [run_once() for _ in range(runs)]
+
+    totals = [total for total, _, _ in results]
+    print(f"import logan: median {statistics.median(totals) / 1000:.1f} ms over {runs} runs "
+          f"(min {min(totals) / 1000:.1f}, max {max(totals) / 1000:.1f})")
+
+    _, times, loaded = results[-1]
+    print("\nslowest modules by self time (last run):")
+    for name, self_us, _ in sorted(times, key=lambda entry: entry[1], reverse=True)[:10]:
+        print(f"  {self_us / 1000:>6.1f} ms  {name}")
+
+    print(f"\nserver/HTTP modules loaded: {', '.join(loaded) if loaded else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
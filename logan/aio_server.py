@@ -0,0 +1,291 @@
+import asyncio
+import json
+import os
+from urllib.parse import urlsplit, parse_qs
+from .static import StaticAssets
+from .filters import StreamFilter
+from .hub import Subscriber, GzipStream, HEARTBEAT_FRAME, accepts_gzip, parse_batch, parse_event_id
+
+
+_REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+}
+
+
+class AsyncSubscriber(Subscriber):
+    """Subscriber for streams served by an asyncio event loop.
+
+    Logs may be published from other threads (e.g. the shared-memory
+    reader), so waking the stream goes through ``call_soon_threadsafe``, at
+    most once per burst of pushes.
+    """
+
+    def __init__(self, loop, **options):
+        super().__init__(**options)
+        self._loop = loop
+        self._ready = asyncio.Event()
+        self._wake_scheduled = False
+
+    def _notify(self):
+        if self._wake_scheduled:
+            return
+        self._wake_scheduled = True
+        try:
+            self._loop.call_soon_threadsafe(self._wake)
+        except RuntimeError:
+            # Event loop already closed; the stream is gone
+            pass
+
+    def _wake(self):
+        self._wake_scheduled = False
+        self._ready.set()
+
+    async def wait(self, timeout: float) -> list:
+        """Wait until frames are available or ``timeout`` passes, then take them all."""
+        if not self._frames and not self.closed:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        if self.batch_linger and self._frames and len(self._frames) < self.max_batch_records:
+            await asyncio.sleep(self.batch_linger)
+        return self.pop_all()
+
+
+class _Request:
+    def __init__(self, method, target, version, headers, body):
+        self.method = method
+        self.version = version
+        self.headers = headers
+        self.body = body
+        url = urlsplit(target)
+        self.path = url.path
+        self.args = {name: values[0] for name, values in parse_qs(url.query).items()}
+        self.mimetype = headers.get('content-type', '').split(';')[0].strip()
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+
+class AsyncLoganServer:
+    """Event-loop HTTP server exposing the same routes as the Flask app.
+
+    Every connection, including each open ``/api/logs/stream``, is a
+    coroutine rather than a worker thread, so the number of viewers is not
+    capped by a thread pool and cannot starve log ingest. Implements just
+    enough HTTP/1.1 for the viewer and the Logan client: keep-alive,
+    ``Content-Length`` request bodies, and SSE responses delimited by
+    closing the connection.
+    """
+
+    MAX_BODY_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, hub, port=5000, unix_socket=None, heartbeat_interval=30.0, assets=None, sock=None):
+        self.hub = hub
+        # An already-bound TCP socket to serve on instead of binding ``port``
+        self.sock = sock
+        self.assets = assets if assets is not None else StaticAssets.load()
+        self.port = port
+        self.unix_socket = unix_socket
+        self.heartbeat_interval = heartbeat_interval
+        self._servers = []
+
+    def serve_forever(self, on_ready=None):
+        """Run the event loop, calling ``on_ready`` once every listening socket is bound."""
+        asyncio.run(self._serve(on_ready))
+
+    async def start(self):
+        if self.sock is not None:
+            tcp_server = await asyncio.start_server(self._handle_connection, sock=self.sock)
+        else:
+            tcp_server = await asyncio.start_server(self._handle_connection, host='0.0.0.0', port=self.port)
+        # Report the real port when asked for port 0
+        self.port = tcp_server.sockets[0].getsockname()[1]
+        self._servers.append(tcp_server)
+        if self.unix_socket:
+            if os.path.exists(self.unix_socket):
+                os.unlink(self.unix_socket)
+            self._servers.append(await asyncio.start_unix_server(self._handle_connection, path=self.unix_socket))
+            os.chmod(self.unix_socket, 0o600)
+
+    async def _serve(self, on_ready=None):
+        await self.start()
+        if on_ready is not None:
+            on_ready()
+        await asyncio.gather(*(server.serve_forever() for server in self._servers))
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader, writer)
+                if request is None:
+                    break
+                if not await self._dispatch(request, reader, writer):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            # Client closed the connection between requests
+            return None
+
+        lines = head.decode('latin-1').split("\r\n")
+        method, target, version = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+        if 'transfer-encoding' in headers:
+            await self._respond(writer, 411, {'error': 'chunked request bodies are not supported'}, keep_alive=False)
+            return None
+
+        length = int(headers.get('content-length') or 0)
+        if length > self.MAX_BODY_BYTES:
+            await self._respond(writer, 413, {'error': 'request body too large'}, keep_alive=False)
+            return None
+
+        body = await reader.readexactly(length) if length else b""
+        return _Request(method, target, version, headers, body)
+
+    async def _respond(self, writer, status, body, content_type='application/json', keep_alive=True, headers=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        head = f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        if content_type:
+            head += f"Content-Type: {content_type}\r\n"
+        for name, value in (headers or {}).items():
+            head += f"{name}: {value}\r\n"
+        head += (
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+        return keep_alive
+
+    async def _dispatch(self, request, reader, writer):
+        """Serve one request. Returns whether the connection can take another."""
+        keep_alive = request.keep_alive
+        path = request.path
+
+        if path == '/api/logs/stream':
+            await self._stream_logs(request, reader, writer)
+            return False
+
+        if path in ('/api/log', '/api/logs/batch'):
+            if request.method != 'POST':
+                return await self._respond(writer, 405, {'error': 'method not allowed'}, keep_alive=keep_alive)
+            if path == '/api/log':
+                try:
+                    log_data = json.loads(request.body)
+                except ValueError:
+                    return await self._respond(writer, 400, {'error': 'invalid JSON'}, keep_alive=keep_alive)
+                if not isinstance(log_data, dict):
+                    return await self._respond(writer, 400, {'error': 'log record must be a JSON object'},
+                                               keep_alive=keep_alive)
+                self.hub.publish([log_data])
+                return await self._respond(writer, 200, {'status': 'ok'}, keep_alive=keep_alive)
+
+            records, rejected = parse_batch(request.body, request.mimetype)
+            self.hub.publish(records)
+            return await self._respond(writer, 200, {'status': 'ok', 'accepted': len(records), 'rejected': rejected},
+                                       keep_alive=keep_alive)
+
+        if request.method != 'GET':
+            return await self._respond(writer, 405, {'error': 'method not allowed'}, keep_alive=keep_alive)
+
+        if path == '/api/stats':
+            return await self._respond(writer, 200, self.hub.stats(), keep_alive=keep_alive)
+
+        if path == '/':
+            return await self._serve_asset('index.html', request, writer, keep_alive)
+
+        if path.startswith('/web_ui/'):
+            return await self._serve_asset(path[len('/web_ui/'):], request, writer, keep_alive)
+
+        return await self._respond(writer, 404, {'error': 'not found'}, keep_alive=keep_alive)
+
+    async def _serve_asset(self, filename, request, writer, keep_alive):
+        result = self.assets.respond(filename, if_none_match=request.headers.get('if-none-match'),
+                                     accept_encoding=request.headers.get('accept-encoding'),
+                                     version=request.args.get('v'))
+        if result is None:
+            return await self._respond(writer, 404, {'error': 'not found'}, keep_alive=keep_alive)
+        status, headers, body = result
+        content_type = headers.pop('Content-Type', None)
+        return await self._respond(writer, status, body, content_type=content_type, keep_alive=keep_alive,
+                                   headers=headers)
+
+    async def _stream_logs(self, request, reader, writer):
+        last_event_id = parse_event_id(request.headers.get('last-event-id') or request.args.get('last_event_id'))
+        try:
+            stream_filter = StreamFilter.from_args(request.args)
+        except ValueError as e:
+            await self._respond(writer, 400, {'error': str(e)}, keep_alive=False)
+            return
+
+        gzip = GzipStream() if accepts_gzip(request.headers.get('accept-encoding')) else None
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Access-Control-Allow-Origin: *\r\n"
+            b"Vary: Accept-Encoding\r\n"
+            + (b"Content-Encoding: gzip\r\n" if gzip else b"")
+            + b"Connection: close\r\n"
+            b"\r\n"
+        )
+
+        def send(data):
+            # Flushed after every write, so compressed events still arrive as they happen
+            writer.write(gzip.compress(data) if gzip else data)
+
+        peer = writer.get_extra_info('peername')
+        subscriber = AsyncSubscriber(asyncio.get_running_loop(), peer=str(peer) if peer else None,
+                                     batch=request.args.get('batch') == '1', filter=stream_filter,
+                                     **self.hub.subscriber_options)
+        backlog = self.hub.subscribe(subscriber, last_event_id)
+        # Viewers never send anything after the request, so EOF means they left
+        disconnected = asyncio.ensure_future(reader.read())
+        try:
+            # Replay missed history in one burst
+            if backlog:
+                send(backlog)
+            await writer.drain()
+
+            while True:
+                waiting = asyncio.ensure_future(subscriber.wait(self.heartbeat_interval))
+                await asyncio.wait({waiting, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    waiting.cancel()
+                    break
+
+                frames = waiting.result()
+                if subscriber.closed:
+                    # Dropped as a slow consumer; the viewer reconnects and resumes from history
+                    break
+                # Send heartbeat to keep connection alive
+                send(b"".join(frames) if frames else HEARTBEAT_FRAME)
+                await writer.drain()
+        finally:
+            self.hub.unsubscribe(subscriber)
+            disconnected.cancel()
@@ -0,0 +1,55 @@
+import sys
+
+
+# Per-code-object (file, function) pairs, shared by every materialized callstack
+_code_info = {}
+_CODE_INFO_LIMIT = 4096
+
+
+def capture(skip_file: str, limit: int = None, depth: int = 1) -> list:
+    """Capture the calling stack as raw ``(code, lineno)`` pairs, innermost first.
+
+    This is the only part of callstack handling that has to run on the
+    logging thread. Frames whose code lives in ``skip_file`` are left out,
+    and the walk stops after ``limit`` frames (``None`` for the whole stack).
+    """
+    if limit == 0:
+        return []
+
+    frames = []
+    frame = sys._getframe(depth)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename != skip_file:
+            frames.append((code, frame.f_lineno))
+            if len(frames) == limit:
+                break
+        frame = frame.f_back
+    return frames
+
+
+def _info(code) -> tuple:
+    info = _code_info.get(code)
+    if info is None:
+        if len(_code_info) >= _CODE_INFO_LIMIT:
+            _code_info.clear()
+        info = _code_info[code] = (code.co_filename, code.co_name)
+    return info
+
+
+def materialize(frames: list) -> list:
+    """Turn captured ``(code, lineno)`` pairs into the JSON-ready form the server expects."""
+    callstack = []
+    for code, lineno in frames:
+        filename, function = _info(code)
+        callstack.append({"file": filename, "line": lineno, "function": function})
+    return callstack
+
+
+def caller(frames: list) -> tuple:
+    """Return ``(file, line, function)`` for the innermost captured frame, or None."""
+    if not frames:
+        return None
+    code, lineno = frames[0]
+    filename, function = _info(code)
+    return filename, lineno, function
@@ -1,13 +1,28 @@
+import atexit
 import json
-import time
 import traceback
-import inspect
+import os
 import socket
 import logging
+import tempfile
+import time
+import re
+import string
+import sys
+import threading
+import warnings
 from datetime import datetime
+from functools import partial
 from typing import Optional
-import requests
-from .server import LoganServer
+from .sender import LogSender
+from .policy import CallstackPolicy, level_number, DEBUG, INFO, WARNING, ERROR
+from . import callstack as callstacks
+
+_FORMATTER = string.Formatter()
+_unused_args_warnings = {}
+_FIELD_INDEX = re.compile(r"\d+")
+# A %-style conversion, e.g. %s, %5.2f or %(name)r, but not a literal "%%"
+_PERCENT_PLACEHOLDER = re.compile(r"(?<!%)(?:%%)*%(?:\(\w+\))?[-#0+]*(?:\*|\d+)?(?:\.(?:\*|\d+))?[diouxXeEfFgGcrsa]")
 
 
 class Logan:
@@ -15,11 +30,107 @@ class Logan:
     _server_url = None
     _port = None
     _logging_handler = None
+    _sender = None
+    _transport = None
+    _transport_factory = None
+    _sender_options = {}
+    _fork_hook_registered = False
+    _http_options = {}
+    _registry = None
+    _shared_options = {}
+    _next_rejoin = 0.0
+    _identity_pid = None
+    _process_name = None
+    _exit_flush_registered = False
+    # How long a process waits at exit for its queued logs to be sent
+    _exit_flush_timeout = 5.0
+    _callstack_policy = CallstackPolicy()
+    # Minimum severity per namespace, consulted before any other work in the public methods
+    _min_levels = {}
+    _default_level = DEBUG
+    _suppressed = {}
 
     @classmethod
-    def init(cls, max_port_attempts: int = 100, logging_handler: Optional[logging.Handler] = None, no_server: bool = False):
-        """Initialize Logan log viewer and start the Flask server on an available port."""
+    def init(cls, max_port_attempts: int = 100, logging_handler: Optional[logging.Handler] = None, no_server: bool = False,
+             max_queue_size: int = 10000, batch_size: int = 100, batch_linger: float = 0.05, pool_size: int = 4,
+             timeout: float = 1.0, failure_threshold: int = 3, fallback: str = "buffer",
+             transport: str = "http", shm_size: int = 8 * 1024 * 1024, unix_socket: bool = True,
+             callstack_policy: Optional[dict] = None, level="debug", levels: Optional[dict] = None,
+             history_records: int = 10000, history_bytes: int = 16 * 1024 * 1024, server_mode: str = "waitress",
+             viewer_queue_size: int = 10000, slow_viewer_policy: str = "coalesce", startup_timeout: float = 10.0,
+             shared=False, shared_linger: float = 60.0):
+        """Initialize Logan log viewer and start the Flask server on an available port.
+
+        Logs are queued in-process (up to ``max_queue_size``) and shipped by a
+        background thread in batches of up to ``batch_size``, waiting at most
+        ``batch_linger`` seconds for a batch to fill. Requests reuse up to
+        ``pool_size`` keep-alive connections to the server.
+
+        After ``failure_threshold`` consecutive failed sends (each bounded by
+        ``timeout`` seconds) the transport stops contacting the server and
+        probes it with exponential backoff instead. Meanwhile logs are kept in
+        a local buffer and replayed on recovery (``fallback="buffer"``), printed
+        to the console (``"console"``) or discarded (``"drop"``).
+
+        With ``transport="shm"`` logs skip HTTP entirely and are written to a
+        ``shm_size``-byte shared-memory ring buffer that the server process
+        drains in bulk. With ``transport="inprocess"`` the server runs on a
+        thread of this process instead of a child process, and batches are
+        handed to it as Python objects, serialized once for the viewers.
+
+        Where the platform supports it, the server also listens on a Unix
+        domain socket and the HTTP transport sends logs through it rather than
+        over TCP loopback; pass ``unix_socket=False`` to always use TCP. The
+        browser viewer is served over TCP either way.
+
+        ``callstack_policy`` maps a log type, or a ``(type, namespace)`` tuple
+        with ``None`` as a wildcard, to how much of the callstack to capture:
+        ``"none"``, ``"caller"``, ``"full"`` or a number of frames. For example
+        ``{"error": "full", "debug": "caller"}``. Unlisted logs get full stacks.
+
+        Logs below ``level`` are discarded before any work is done; ``levels``
+        overrides it per namespace, e.g. ``{"db": "warning"}``.
+
+        The server keeps the latest ``history_records`` logs (at most
+        ``history_bytes`` of JSON) and replays them to newly opened viewers.
+        Each viewer has at most ``viewer_queue_size`` logs waiting to be sent;
+        when a slow viewer falls further behind, ``slow_viewer_policy`` drops
+        the oldest (``"drop_oldest"``), drops them and shows how many were
+        skipped (``"coalesce"``), or disconnects the viewer so it reconnects
+        and catches up from history (``"disconnect"``).
+
+        ``init`` waits up to ``startup_timeout`` seconds for the server process
+        to start accepting connections. Logs are queued until it does, so
+        nothing is lost when startup is slow, and nothing waits longer than
+        necessary when it is fast.
+
+        ``server_mode="asyncio"`` serves everything from a single event loop
+        instead of waitress's thread pool, so any number of open viewers can
+        coexist with log ingest.
+
+        With ``shared=True`` (or a group name), processes on this machine
+        share one server: the first to call ``init`` starts it and records
+        it in a discovery file, and later callers, e.g. gunicorn or
+        ``multiprocessing`` workers, attach to it instead of starting their
+        own. The shared server runs on its own, not as a child of whichever
+        process started it, and exits ``shared_linger`` seconds after the
+        last process using it has exited. Logs reach it over TCP. Every
+        record carries the ``pid`` and ``process`` name of the process that
+        logged it.
+        """
         cls._logging_handler = logging_handler
+        if callstack_policy is not None:
+            cls._callstack_policy = CallstackPolicy(rules=callstack_policy)
+        cls.set_level(level)
+        for namespace, namespace_level in (levels or {}).items():
+            cls.set_level(namespace_level, namespace=namespace)
+
+        if transport not in ("http", "shm", "inprocess"):
+            raise ValueError(f"transport must be 'http', 'shm' or 'inprocess', got {transport!r}")
+        if shared and transport != "http":
+            raise ValueError(f"shared servers need transport='http', got {transport!r}")
+        if shared and os.name != "posix":
+            raise ValueError("shared servers are only supported on POSIX systems")
 
         if no_server:
             return
@@ -28,70 +139,273 @@ class Logan:
             print("Logan server is already running")
             return
         
-        # Find an available port
-        port = cls._find_available_port(start_port=5000, max_attempts=max_port_attempts)
-        
-        cls._server = LoganServer(port=port)
-        cls._server.run()  # starts the multiprocessing.Process directly
+        attached = False
+        if shared:
+            # The first process starts the server and the rest attach to it
+            from .discovery import ServerRegistry
+            cls._registry = ServerRegistry.for_name(shared)
+            cls._shared_options = dict(max_port_attempts=max_port_attempts, startup_timeout=startup_timeout,
+                                       linger=shared_linger, history_records=history_records,
+                                       history_bytes=history_bytes, mode=server_mode,
+                                       max_pending=viewer_queue_size, slow_consumer_policy=slow_viewer_policy)
+            attached = cls._join_shared_server()
+            port, socket_path, ring = cls._server.port, None, None
+        else:
+            cls._registry = None
+            port, socket_path, ring = cls._start_server(
+                transport=transport, max_port_attempts=max_port_attempts, shm_size=shm_size, unix_socket=unix_socket,
+                history_records=history_records, history_bytes=history_bytes, server_mode=server_mode,
+                viewer_queue_size=viewer_queue_size, slow_viewer_policy=slow_viewer_policy)
         cls._port = port
-
-        # Wait a moment for server to start
-        time.sleep(0.3)  # keep a short wait or replace with a health check later
         cls._server_url = f"http://localhost:{port}"
 
-        # Display ASCII art and URL
-        cls._display_startup_message(port)
+        if transport == "inprocess":
+            from .process import InProcessTransport
+            cls._transport_factory = None
+            cls._transport = InProcessTransport(cls._server.server.hub)
+        elif ring is not None:
+            from .shm import ShmTransport
+            cls._transport_factory = None
+            cls._transport = ShmTransport(ring)
+        else:
+            cls._http_options = dict(pool_size=pool_size, timeout=timeout, failure_threshold=failure_threshold,
+                                     fallback=fallback)
+            cls._transport_factory = partial(cls._new_http_transport, cls._server_url, socket_path, cls._http_options)
+            cls._transport = cls._transport_factory()
+        # Logs queue up in the sender until the server is accepting connections
+        cls._sender_options = dict(max_queue_size=max_queue_size, batch_size=batch_size, linger=batch_linger)
+        cls._sender = LogSender(cls._send_batch, **cls._sender_options)
+        if cls._server.wait_ready(startup_timeout):
+            cls._sender.start()
+        else:
+            print(f"Logan server did not start within {startup_timeout}s; logs are queued until it does")
+            threading.Thread(target=cls._start_sender_when_ready, args=(cls._sender, cls._server),
+                             name="logan-startup", daemon=True).start()
+        
+        cls._register_exit_flush()
+        if hasattr(os, "register_at_fork") and not cls._fork_hook_registered:
+            os.register_at_fork(after_in_child=cls._after_fork_in_child)
+            cls._fork_hook_registered = True
+
+        if attached:
+            print(f"Logan: attached to the shared server at {cls._server_url}")
+        else:
+            # Display ASCII art and URL
+            cls._display_startup_message(port)
     
     @classmethod
-    def _find_available_port(cls, start_port: int = 5000, max_attempts: int = 100):
-        """Find an available port starting from start_port."""
-        for i in range(max_attempts):
-            port = start_port + i
-            if cls._is_port_available(port):
-                return port
+    def _join_shared_server(cls) -> bool:
+        """Attach to the registry's server, or start one if there is none. Returns True if attached."""
+        from .discovery import AttachedServer, DetachedServer
+        options = dict(cls._shared_options)
+        max_port_attempts = options.pop("max_port_attempts")
+        startup_timeout = options.pop("startup_timeout")
+
+        with cls._registry.lock():
+            info = cls._registry.read()
+            if info is not None:
+                cls._server = AttachedServer(info)
+            else:
+                listen_socket = cls._bind_listening_socket(start_port=5000, max_attempts=max_port_attempts)
+                cls._server = DetachedServer(cls._registry, listen_socket, **options)
+                cls._server.run()
+                # Only advertise a server others can actually reach
+                if not cls._server.wait_ready(startup_timeout):
+                    return False
+                info = {"pid": cls._server.pid, "port": cls._server.port}
+            cls._registry.join(info, os.getpid())
+        return isinstance(cls._server, AttachedServer)
+
+    @classmethod
+    def _rejoin_shared_server(cls):
+        """Switch to another shared server after the one this process was using went away.
+
+        Called on the sender thread while the circuit breaker is open. If the
+        registry still names the same server, this waits for the breaker as
+        usual; otherwise the transport is pointed at the server that replaced
+        it, and buffered logs go there with the next batch.
+        """
+        now = time.monotonic()
+        if now < cls._next_rejoin:
+            return
+        cls._next_rejoin = now + 1.0
+        previous_pid = cls._server.pid
+        try:
+            cls._join_shared_server()
+        except (OSError, RuntimeError):
+            return
+        if cls._server.pid == previous_pid:
+            return
+        cls._port = cls._server.port
+        cls._server_url = f"http://localhost:{cls._port}"
+        cls._transport_factory = partial(cls._new_http_transport, cls._server_url, None, cls._http_options)
+        cls._transport.reconnect(cls._server_url)
+        cls._transport.breaker.record_success()
+
+    @classmethod
+    def _start_server(cls, transport, max_port_attempts, shm_size, unix_socket, history_records, history_bytes,
+                      server_mode, viewer_queue_size, slow_viewer_policy):
+        """Start this process's own server. Returns its port, Unix socket path and shared-memory ring."""
+        # Bind once here; the server process serves on this very socket
+        listen_socket = cls._bind_listening_socket(start_port=5000, max_attempts=max_port_attempts)
+        port = listen_socket.getsockname()[1]
         
-        raise RuntimeError(f"Could not find an available port after trying {max_attempts} ports starting from {start_port}")
+        server_options = dict(port=port, listen_socket=listen_socket, history_records=history_records,
+                              history_bytes=history_bytes, mode=server_mode,
+                              max_pending=viewer_queue_size, slow_consumer_policy=slow_viewer_policy)
+        
+        # The server and transport stacks are imported only when a server is
+        # actually started, so importing logan stays cheap
+        if transport == "inprocess":
+            from .process import ServerThread
+            cls._server = ServerThread(**server_options)
+            cls._server.run()
+            return port, None, None
+        
+        from .process import ServerProcess
+        ring = None
+        if transport == "shm":
+            from .shm import ShmRingBuffer
+            ring = ShmRingBuffer.create(shm_size)
+        socket_path = cls._unix_socket_path(port) if unix_socket and transport == "http" and hasattr(socket, "AF_UNIX") else None
+        cls._server = ServerProcess(shm_name=ring.name if ring else None, unix_socket=socket_path, **server_options)
+        cls._server.run()  # starts the server's multiprocessing.Process
+        return port, socket_path, ring
+    
+    @classmethod
+    def _new_http_transport(cls, server_url: str, socket_path: Optional[str], options: dict):
+        from .transport import HttpTransport, UnixSocketTransport, CircuitBreaker
+        breaker = CircuitBreaker(failure_threshold=options["failure_threshold"])
+        kwargs = dict(pool_size=options["pool_size"], timeout=options["timeout"], breaker=breaker,
+                      fallback=options["fallback"], console=cls._log_entry_to_console)
+        if socket_path:
+            return UnixSocketTransport(socket_path, **kwargs)
+        return HttpTransport(server_url, **kwargs)
+    
+    @classmethod
+    def _after_fork_in_child(cls):
+        """Give a forked child (e.g. a Pool or gunicorn worker) its own sender thread and connections.
+
+        Threads do not survive fork and pooled connections must not be
+        shared, so the child attaches to the parent's server over HTTP. With
+        the in-process or shared-memory transports that is not possible, and
+        the child logs to the console instead. A child of a shared-server
+        process also records itself in the registry, so the server stays up
+        while the child runs even if its parent exits first.
+        """
+        if cls._sender is None:
+            return
+        if cls._transport_factory is None:
+            cls._server = None
+            cls._sender = None
+            cls._transport = None
+            return
+        from .discovery import AttachedServer
+        cls._server = AttachedServer({"pid": cls._server.pid, "port": cls._port})
+        cls._transport = cls._transport_factory()
+        cls._sender = LogSender(cls._send_batch, **cls._sender_options)
+        cls._sender.start()
+        if cls._registry is not None:
+            # Taking the registry lock can block, which the fork hook must not
+            threading.Thread(target=cls._join_registry_after_fork, args=(cls._registry, cls._server.pid),
+                             name="logan-join", daemon=True).start()
+
+    @classmethod
+    def _join_registry_after_fork(cls, registry, server_pid: int):
+        """Record this process as a producer of the shared server, unless it has been replaced meanwhile."""
+        try:
+            with registry.lock():
+                info = registry.read()
+                if info is not None and info["pid"] == server_pid:
+                    registry.join(info, os.getpid())
+        except OSError:
+            # A replacement server is found, and joined, when the breaker opens
+            pass
     
     @classmethod
-    def _is_port_available(cls, port: int) -> bool:
-        """Check if a port is available for use."""
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+    def _register_exit_flush(cls):
+        """Send the logs still queued when the process exits, waiting at most ``_exit_flush_timeout`` seconds."""
+        if cls._exit_flush_registered:
+            return
+        cls._exit_flush_registered = True
+        atexit.register(cls._flush_at_exit)
+        # multiprocessing children leave through os._exit, skipping atexit,
+        # but they do run multiprocessing's finalizers
+        from multiprocessing import util
+        cls._add_exit_finalizer()
+        # Children forked by multiprocessing discard inherited finalizers before running
+        util.register_after_fork(cls, lambda logan: logan._add_exit_finalizer())
+
+    @classmethod
+    def _add_exit_finalizer(cls):
+        from multiprocessing import util
+        util.Finalize(None, cls._flush_at_exit, exitpriority=10)
+
+    @classmethod
+    def _flush_at_exit(cls):
+        if not cls.flush(timeout=cls._exit_flush_timeout):
+            print(f"Logan: {cls._sender.pending()} logs were not sent before exit")
+
+    @classmethod
+    def _start_sender_when_ready(cls, sender: LogSender, server):
+        if not server.wait_ready():
+            print("Logan server exited during startup")
+        # Started either way; if the server is gone, the transport's fallback takes the logs
+        sender.start()
+    
+    @classmethod
+    def _bind_listening_socket(cls, start_port: int = 5000, max_attempts: int = 100) -> socket.socket:
+        """Bind and listen on the first free port from start_port, or on any free port if none is.
+
+        The bound socket is handed to the server process as is, so no other
+        process can take the port between choosing it and serving on it.
+        """
+        for port in [start_port + i for i in range(max_attempts)] + [0]:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            # Same as waitress, so a port in TIME_WAIT from a previous run can be reused
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             try:
-                sock.bind(('localhost', port))
-                return True
+                sock.bind(('0.0.0.0', port))
+                sock.listen(1024)
             except OSError:
-                return False
+                sock.close()
+                continue
+            return sock
+
+        raise RuntimeError("Could not bind a port for the Logan server")
     
     @classmethod
-    def _log(cls, message: str, type: str = "info", namespace: str = "global", exception: Optional[Exception] = None):
-        """Send a log message to the Logan server."""
+    def _unix_socket_path(cls, port: int) -> str:
+        """Unix socket path for a server started by this process."""
+        return os.path.join(tempfile.gettempdir(), f"logan-{os.getpid()}-{port}.sock")
+
+    @classmethod
+    def _log(cls, message: str, type: str = "info", namespace: str = "global", exception: Optional[Exception] = None,
+             args: tuple = (), kwargs: Optional[dict] = None):
+        """Send a log message to the Logan server.
+
+        When ``args`` or ``kwargs`` are given, ``message`` is a template that
+        is only formatted on the sender thread (or right away for console
+        output), so arguments should not be mutated after the call.
+        """
         if cls._server is None:
-            cls._log_to_console(message, type, namespace, exception)
+            cls._log_to_console(cls._format_message(message, args, kwargs), type, namespace, exception)
             return
         
-        # Get caller information for callstack
-        frame = inspect.currentframe()
-        callstack = []
-        try:
-            while frame:
-                if frame.f_code.co_filename != __file__:  # Skip Logan's own frames
-                    callstack.append({
-                        "file": frame.f_code.co_filename,
-                        "line": frame.f_lineno,
-                        "function": frame.f_code.co_name
-                    })
-                frame = frame.f_back
-        finally:
-            del frame
+        # Only grab (code, lineno) pairs here; the sender thread builds the dicts
+        frames = callstacks.capture(__file__, limit=cls._callstack_policy.limit(type, namespace))
         
         log_entry = {
             "timestamp": datetime.now().isoformat(),
             "type": type,
             "message": message,
             "namespace": namespace,
-            "callstack": callstack,
+            "callstack": frames,
             "exception": None
         }
+        if args or kwargs:
+            # Where the call came from, for warnings raised while formatting on the sender thread
+            log_entry["args"] = (args, kwargs, frames or callstacks.capture(__file__, limit=1))
         
         if exception:
             log_entry["exception"] = {
@@ -101,19 +415,147 @@ class Logan:
 
         # Route to logging handler if provided
         if cls._logging_handler:
-            cls._send_to_logging_handler(message, type, namespace, callstack, exception)
+            cls._send_to_logging_handler(message, type, namespace, frames, exception, args, kwargs)
+
+        # Hand off to the sender thread; never block the caller on the network
+        cls._sender.submit(log_entry)
+
+    @classmethod
+    def set_level(cls, level, namespace: Optional[str] = None):
+        """Set the minimum level ("debug", "info", "warning", "error") for a namespace, or the default if none is given."""
+        if namespace is None:
+            cls._default_level = level_number(level)
+        else:
+            cls._min_levels[namespace] = level_number(level)
+
+    @classmethod
+    def _count_suppressed(cls, type: str, namespace: str):
+        key = (type, namespace)
+        cls._suppressed[key] = cls._suppressed.get(key, 0) + 1
+
+    @classmethod
+    def set_callstack_policy(cls, level, type: Optional[str] = None, namespace: Optional[str] = None):
+        """Change how much callstack is captured for a log type and/or namespace at runtime.
+
+        ``level`` is ``"none"``, ``"caller"``, ``"full"`` or a number of frames.
+        Leaving both ``type`` and ``namespace`` unset changes the default.
+        """
+        cls._callstack_policy.set(level, type=type, namespace=namespace)
+
+    @classmethod
+    def _send_batch(cls, batch: list):
+        """Finish building queued log entries and pass them to the transport. Runs on the sender thread."""
+        pid = os.getpid()
+        if pid != cls._identity_pid:
+            cls._identity_pid = pid
+            cls._process_name = cls._current_process_name()
+        for log_entry in batch:
+            log_entry["pid"] = pid
+            log_entry["process"] = cls._process_name
+            log_entry["callstack"] = callstacks.materialize(log_entry["callstack"])
+            if not isinstance(log_entry["message"], str):
+                # e.g. Logan.info(b"raw"); one unencodable record must not sink the whole batch
+                log_entry["message"] = str(log_entry["message"])
+            if "args" in log_entry:
+                args, kwargs, frames = log_entry.pop("args")
+                log_entry["message"] = cls._format_message(log_entry["message"], args, kwargs,
+                                                           caller=callstacks.caller(frames))
+        cls._transport.send_batch(batch)
+        if cls._registry is not None:
+            from .transport import CircuitBreaker
+            if cls._transport.breaker.state == CircuitBreaker.OPEN:
+                cls._rejoin_shared_server()
 
-        # Send log to server
+    @staticmethod
+    def _current_process_name() -> str:
+        # Pool and Process workers have meaningful names, but do not import
+        # multiprocessing just to ask
+        multiprocessing = sys.modules.get("multiprocessing")
+        if multiprocessing is not None and multiprocessing.current_process().name != "MainProcess":
+            return multiprocessing.current_process().name
+        return os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "python"
+
+    @staticmethod
+    def _format_fields(message: str) -> int:
+        """Number of positional arguments the str.format fields in ``message`` use, or -1 if it has none."""
+        if "{" not in message:
+            return -1
+        automatic, explicit, named = 0, 0, False
         try:
-            response = requests.post(f"{cls._server_url}/api/log", json=log_entry, timeout=1)
-            if response.status_code != 200:
-                print(f"Failed to send log: {response.status_code}")
-        except requests.exceptions.RequestException:
-            # Server might not be ready yet, ignore silently
-            pass
+            for _, field, _, _ in _FORMATTER.parse(message):
+                if field is None:
+                    continue
+                index = _FIELD_INDEX.match(field)
+                if field == "" or field[0] in ".[":
+                    automatic += 1
+                elif index:
+                    explicit = max(explicit, int(index.group()) + 1)
+                else:
+                    named = True
+        except ValueError:
+            return -1
+        if not (automatic or explicit or named):
+            return -1
+        return max(automatic, explicit)
+
+    @classmethod
+    def _uses_percent_style(cls, message: str, args: tuple, kwargs: Optional[dict]) -> bool:
+        # "{}" fields win, so "progress {}%" is formatted with str.format
+        return (bool(args) and not kwargs and _PERCENT_PLACEHOLDER.search(message) is not None
+                and cls._format_fields(message) < 0)
+
+    @classmethod
+    def _format_message(cls, message: str, args: tuple = (), kwargs: Optional[dict] = None,
+                        caller: Optional[tuple] = None) -> str:
+        """Apply deferred arguments: %-style if the template has %-placeholders, str.format otherwise.
+
+        Arguments the template has no place for are appended rather than
+        dropped, with a warning: before arguments were deferred, the second
+        and third positional parameters were ``namespace`` and ``exception``.
+        The warning names ``caller``, the ``(file, line, function)`` of the
+        logging call; formatting usually runs on the sender thread, where
+        the stack says nothing about who logged.
+        """
+        if not args and not kwargs:
+            return message
+        try:
+            if cls._uses_percent_style(message, args, kwargs):
+                # Like logging, a single mapping argument fills %(name)s placeholders
+                if len(args) == 1 and isinstance(args[0], dict):
+                    return message % args[0]
+                # Surplus arguments already raise "not all arguments converted"
+                return message % args
+            used = cls._format_fields(message)
+            formatted = message.format(*args, **(kwargs or {})) if used >= 0 else message
+        except (TypeError, ValueError, KeyError, IndexError) as e:
+            return f"{message} [formatting failed: {e}; args={args!r}, kwargs={kwargs!r}]"
+
+        unused = args[max(used, 0):]
+        if used < 0 and kwargs:
+            unused += (kwargs,)
+        if unused:
+            if caller is None:
+                caller = callstacks.caller(callstacks.capture(__file__, limit=1))
+            text = (f"Logan: message {message!r} has no placeholder for {len(unused)} argument(s); "
+                    "pass namespace= and exception= by keyword")
+            if caller is None:
+                warnings.warn(text)
+            else:
+                # Shown once per call site, like an ordinary warnings.warn
+                warnings.warn_explicit(text, UserWarning, caller[0], caller[1], registry=_unused_args_warnings)
+            formatted = f"{formatted} [unused args: {unused!r}]"
+        return formatted
+
+    @classmethod
+    def flush(cls, timeout: Optional[float] = None) -> bool:
+        """Wait until all queued logs have been sent. Returns False if the timeout expired first."""
+        if cls._sender is None:
+            return True
+        return cls._sender.flush(timeout)
     
     @classmethod
-    def _send_to_logging_handler(cls, message: str, type: str, namespace: str, callstack: list, exception: Optional[Exception] = None):
+    def _send_to_logging_handler(cls, message: str, type: str, namespace: str, frames: list, exception: Optional[Exception] = None,
+                                 args: tuple = (), kwargs: Optional[dict] = None):
         """Send log to the provided logging handler."""
         # Map Logan log types to logging levels
         level_map = {
@@ -128,17 +570,22 @@ class Logan:
         pathname = __file__
         lineno = 0
         func_name = "<unknown>"
-        if callstack:
-            first_call = callstack[0]
-            pathname = first_call.get("file", __file__)
-            lineno = first_call.get("line", 0)
-            func_name = first_call.get("function", "<unknown>")
+        first_call = callstacks.caller(frames)
+        if first_call:
+            pathname, lineno, func_name = first_call
 
         # Create exc_info tuple if exception is provided
         exc_info = None
         if exception:
             exc_info = (exception.__class__, exception, exception.__traceback__)
 
+        # %-style arguments can be handed to logging as-is; anything else is formatted here
+        if cls._uses_percent_style(message, args, kwargs):
+            record_args = args[0] if len(args) == 1 and isinstance(args[0], dict) else args
+        else:
+            message = cls._format_message(message, args, kwargs)
+            record_args = ()
+
         # Create LogRecord
         record = logging.LogRecord(
             name=f"logan.{namespace}",
@@ -146,7 +593,7 @@ class Logan:
             pathname=pathname,
             lineno=lineno,
             msg=message,
-            args=(),
+            args=record_args,
             exc_info=exc_info,
             func=func_name
         )
@@ -154,6 +601,23 @@ class Logan:
         # Send to handler
         cls._logging_handler.handle(record)
 
+    @classmethod
+    def stats(cls) -> dict:
+        """Return counters for suppressed logs, the sender queue and the transport, including the circuit breaker state."""
+        suppressed = {}
+        for (type, namespace), count in list(cls._suppressed.items()):
+            suppressed.setdefault(namespace, {})[type] = count
+        return {
+            "suppressed": suppressed,
+            "sender": cls._sender.stats() if cls._sender else None,
+            "transport": cls._transport.stats() if cls._transport else None,
+        }
+
+    @classmethod
+    def _log_entry_to_console(cls, log_entry: dict):
+        """Print an already-built log entry, used when the server cannot be reached."""
+        cls._log_to_console(log_entry["message"], log_entry["type"], log_entry["namespace"])
+
     @classmethod
     def _log_to_console(cls, message: str, type: str, namespace: str, exception: Optional[Exception] = None):
         """Log message to console when server is not initialized."""
@@ -227,21 +691,33 @@ class Logan:
         return ascii_art_file.read_text(encoding='utf-8')
     
     @classmethod
-    def info(cls, message: str, namespace: str = "global"):
-        """Log an info message."""
-        cls._log(message, type="info", namespace=namespace)
+    def info(cls, message: str, *args, namespace: str = "global", **kwargs):
+        """Log an info message. Extra arguments are formatted into ``message`` only if the log is kept."""
+        if cls._min_levels.get(namespace, cls._default_level) > INFO:
+            cls._count_suppressed("info", namespace)
+            return
+        cls._log(message, type="info", namespace=namespace, args=args, kwargs=kwargs)
     
     @classmethod
-    def warn(cls, message: str, namespace: str = "global"):
+    def warn(cls, message: str, *args, namespace: str = "global", **kwargs):
         """Log a warning message."""
-        cls._log(message, type="warning", namespace=namespace)
+        if cls._min_levels.get(namespace, cls._default_level) > WARNING:
+            cls._count_suppressed("warning", namespace)
+            return
+        cls._log(message, type="warning", namespace=namespace, args=args, kwargs=kwargs)
     
     @classmethod
-    def error(cls, message: str, namespace: str = "global", exception: Optional[Exception] = None):
+    def error(cls, message: str, *args, namespace: str = "global", exception: Optional[Exception] = None, **kwargs):
         """Log an error message."""
-        cls._log(message, type="error", namespace=namespace, exception=exception)
+        if cls._min_levels.get(namespace, cls._default_level) > ERROR:
+            cls._count_suppressed("error", namespace)
+            return
+        cls._log(message, type="error", namespace=namespace, exception=exception, args=args, kwargs=kwargs)
     
     @classmethod
-    def debug(cls, message: str, namespace: str = "global"):
+    def debug(cls, message: str, *args, namespace: str = "global", **kwargs):
         """Log a debug message."""
-        cls._log(message, type="debug", namespace=namespace)
\ No newline at end of file
+        if cls._min_levels.get(namespace, cls._default_level) > DEBUG:
+            cls._count_suppressed("debug", namespace)
+            return
+        cls._log(message, type="debug", namespace=namespace, args=args, kwargs=kwargs)
\ No newline at end of file
@@ -0,0 +1,256 @@
+import fcntl
+import json
+import os
+import select
+import signal
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from .process import SERVER_MODES
+
+
+def _pid_alive(pid) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        # Exists but belongs to someone else, or the platform cannot tell
+        return True
+    return True
+
+
+def _port_open(port, timeout=0.5) -> bool:
+    try:
+        with socket.create_connection(("localhost", port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+class ServerRegistry:
+    """A discovery file recording which Logan server the processes sharing it should log to.
+
+    The first process to call ``Logan.init(shared=...)`` starts a server and
+    records its port here; later callers find it and attach instead of
+    starting their own. ``lock`` serializes that check-then-start across
+    processes, so simultaneous workers end up with one server. The entry
+    also lists the producer processes using the server, which is how the
+    server knows when it is no longer needed. An entry whose server process
+    is gone is ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @classmethod
+    def for_name(cls, name=True):
+        """Registry for a shared-server group; ``True`` is the default group for this user.
+
+        Registries live in a directory only this user can write to, so no one
+        else can plant an entry pointing this user's logs at their server.
+        Raises PermissionError if that directory exists but is not private.
+        """
+        group = "default" if name is True else str(name)
+        directory = os.path.join(tempfile.gettempdir(), f"logan-{os.getuid()}")
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.lstat(directory)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+            raise PermissionError(f"{directory} must be a directory owned by this user and private to it")
+        return cls(os.path.join(directory, f"{group}.json"))
+
+    @contextmanager
+    def lock(self):
+        with open(self.path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self):
+        """Return the entry as written, without checking that its server is still there."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                # Only trust entries this user wrote
+                if os.fstat(f.fileno()).st_uid != os.getuid():
+                    return None
+                info = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(info, dict) or not isinstance(info.get("pid"), int) or not isinstance(info.get("port"), int):
+            return None
+        return info
+
+    def read(self):
+        """Return the recorded server's details if it is still running, else None."""
+        info = self.load()
+        if info is None or not _pid_alive(info["pid"]) or not _port_open(info["port"]):
+            return None
+        return info
+
+    def write(self, info: dict):
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+        # Readers see either the old entry or the new one, never half of it
+        os.replace(temporary, self.path)
+
+    def join(self, info: dict, pid: int):
+        """Record ``pid`` as a producer using the server in ``info``, forgetting producers that have exited."""
+        producers = [producer for producer in info.get("producers", []) if producer != pid and _pid_alive(producer)]
+        self.write(dict(info, producers=producers + [pid]))
+
+    def live_producers(self, server_pid: int) -> list:
+        """The producers still running that use the server with ``server_pid``."""
+        info = self.load()
+        if info is None or info["pid"] != server_pid:
+            return []
+        return [producer for producer in info.get("producers", []) if _pid_alive(producer)]
+
+    def remove(self, server_pid: int):
+        """Delete the entry if it still describes the server with ``server_pid``."""
+        info = self.load()
+        if info is not None and info["pid"] == server_pid:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class AttachedServer:
+    """Stands in for a server started by another process and found through a ``ServerRegistry``."""
+
+    def __init__(self, info: dict):
+        self.info = info
+        self.pid = info["pid"]
+        self.port = info["port"]
+
+    def run(self):
+        pass
+
+    def wait_ready(self, timeout=None) -> bool:
+        return True
+
+    def stop(self):
+        pass
+
+
+class DetachedServer:
+    """Starts a shared ``LoganServer`` as an independent process in its own session.
+
+    Unlike ``ServerProcess`` the server is not a child that dies with the
+    process that happened to start it, and starting it works from daemonic
+    processes such as ``multiprocessing.Pool`` workers. The server keeps
+    running while any producer in its registry entry is alive and exits
+    ``linger`` seconds after the last one has gone.
+    """
+
+    def __init__(self, registry: ServerRegistry, listen_socket, linger: float = 60.0, **options):
+        mode = options.get("mode", "waitress")
+        if mode not in SERVER_MODES:
+            raise ValueError(f"mode must be one of {SERVER_MODES}, got {mode!r}")
+
+        self.registry = registry
+        self.listen_socket = listen_socket
+        self.port = listen_socket.getsockname()[1]
+        self.linger = linger
+        self.options = dict(options, port=self.port)
+        self.process = None
+        self.pid = None
+        self._ready_fd = None
+        self._ready = False
+
+    def run(self):
+        read_fd, write_fd = os.pipe()
+        listen_fd = self.listen_socket.fileno()
+        config = dict(self.options, registry=self.registry.path, linger=self.linger)
+        # The server must find this copy of logan whether or not it is installed
+        package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_parent, os.environ.get("PYTHONPATH")])))
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "logan.discovery", str(listen_fd), str(write_fd), json.dumps(config)],
+                pass_fds=(listen_fd, write_fd), start_new_session=True, env=env,
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        finally:
+            os.close(write_fd)
+            # The server process has its own copy of the socket now
+            self.listen_socket.close()
+        self.pid = self.process.pid
+        self._ready_fd = read_fd
+
+    def wait_ready(self, timeout=None) -> bool:
+        """Wait for the server to report that it is accepting connections.
+
+        Returns False if ``timeout`` seconds pass first or the server exits
+        without getting there.
+        """
+        if self._ready or self._ready_fd is None:
+            return self._ready
+        readable, _, _ = select.select([self._ready_fd], [], [], timeout)
+        if not readable:
+            return False
+        # One byte once ready; end of file if the server died first
+        self._ready = os.read(self._ready_fd, 1) == b"1"
+        os.close(self._ready_fd)
+        self._ready_fd = None
+        return self._ready
+
+    def stop(self):
+        # Other processes may be logging to it; it exits on its own once they are gone
+        pass
+
+
+class _ReadyPipe:
+    """The ``ready`` event ``LoganServer._run_direct`` sets, reported to ``DetachedServer`` over a pipe."""
+
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    def set(self):
+        os.write(self.fd, b"1")
+        os.close(self.fd)
+
+
+def _exit_when_unused(server, registry: ServerRegistry, linger: float, interval: float = 1.0):
+    idle_since = None
+    while True:
+        time.sleep(interval)
+        if registry.live_producers(os.getpid()):
+            idle_since = None
+            continue
+        if idle_since is None:
+            idle_since = time.monotonic()
+        if time.monotonic() - idle_since < linger:
+            continue
+        # Under the lock no producer can be attaching while the entry goes away
+        with registry.lock():
+            if registry.live_producers(os.getpid()):
+                idle_since = None
+                continue
+            registry.remove(os.getpid())
+        server._graceful_exit()
+
+
+def main(argv):
+    """Entry point of the process ``DetachedServer`` starts."""
+    listen_fd, ready_fd, config = int(argv[0]), int(argv[1]), json.loads(argv[2])
+    registry = ServerRegistry(config.pop("registry"))
+    linger = config.pop("linger")
+
+    from .server import LoganServer
+    server = LoganServer(listen_socket=socket.socket(fileno=listen_fd), **config)
+    signal.signal(signal.SIGTERM, lambda s, f: server._graceful_exit())
+    threading.Thread(target=_exit_when_unused, args=(server, registry, linger),
+                     name="logan-linger", daemon=True).start()
+    server._run_direct(ready=_ReadyPipe(ready_fd))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
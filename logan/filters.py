@@ -0,0 +1,143 @@
+from .policy import LEVELS, level_number
+
+
+def _split(value):
+    if value is None:
+        return None
+    items = frozenset(item.strip() for item in value.split(",") if item.strip())
+    return items or None
+
+
+def _index_key(value):
+    # Non-string values (including a missing field) can only match unrestricted subscriptions
+    return value if isinstance(value, str) else None
+
+
+class StreamFilter:
+    """Which records a viewer's stream receives, evaluated on the server before they are queued.
+
+    ``types`` and ``namespaces`` are sets of accepted values, ``min_level``
+    drops records of lower severity, and ``text`` keeps records whose
+    message contains it, ignoring case. Unset criteria accept everything.
+    """
+
+    def __init__(self, types=None, namespaces=None, min_level=None, text=None):
+        self.types = frozenset("warning" if t == "warn" else t for t in types) if types else None
+        self.namespaces = frozenset(namespaces) if namespaces else None
+        self.min_level = level_number(min_level) if min_level is not None else None
+        self.text = text.lower() if text else None
+
+        # Types and min_level folded into one set of accepted types, for SubscriptionIndex
+        self.index_types = self.types
+        if self.min_level is not None:
+            allowed = frozenset(name for name, number in LEVELS.items() if number >= self.min_level)
+            self.index_types = allowed if self.index_types is None else self.index_types & allowed
+
+    @classmethod
+    def from_args(cls, args):
+        """Build a filter from the stream's query parameters, or return None when none are given.
+
+        ``types`` and ``namespaces`` are comma-separated, ``min_level`` is a
+        log type name and ``q`` is the text to match. Raises ValueError for
+        an unknown ``min_level``.
+        """
+        types = _split(args.get('types'))
+        namespaces = _split(args.get('namespaces'))
+        min_level = args.get('min_level') or None
+        text = args.get('q') or None
+        if types is None and namespaces is None and min_level is None and text is None:
+            return None
+        return cls(types=types, namespaces=namespaces, min_level=min_level, text=text)
+
+    def matches(self, record) -> bool:
+        type = _index_key(record.get("type"))
+        if self.types is not None and type not in self.types:
+            return False
+        if self.namespaces is not None and _index_key(record.get("namespace")) not in self.namespaces:
+            return False
+        if self.min_level is not None and LEVELS.get(type, 0) < self.min_level:
+            return False
+        return self.matches_text(record)
+
+    def matches_text(self, record) -> bool:
+        """The part of ``matches`` that SubscriptionIndex cannot answer from its buckets."""
+        return self.text is None or self.text in str(record.get("message", "")).lower()
+
+    def describe(self) -> dict:
+        return {
+            "types": sorted(self.types) if self.types else None,
+            "namespaces": sorted(self.namespaces) if self.namespaces else None,
+            "min_level": self.min_level,
+            "q": self.text,
+        }
+
+
+class SubscriptionIndex:
+    """Finds the subscribers whose filters accept a record without testing every filter.
+
+    Each subscriber is filed under every ``(namespace, type)`` pair its
+    filter accepts, with ``None`` standing for "any". A record can then only
+    match the four buckets for its own namespace and type; the union of
+    those is cached per pair until the set of subscribers changes, so the
+    cost per record does not grow with the number of viewers that do not
+    want it. Only the text criterion is still checked record by record.
+    Not thread-safe on its own; the hub uses it under its lock.
+    """
+
+    MAX_CACHED_PAIRS = 4096
+
+    def __init__(self):
+        self._buckets = {}
+        self._matches = {}
+        self.filtered = set()
+
+    def _keys(self, subscriber):
+        stream_filter = subscriber.filter
+        if stream_filter is None:
+            return [(None, None)]
+        namespaces = stream_filter.namespaces if stream_filter.namespaces is not None else (None,)
+        types = stream_filter.index_types if stream_filter.index_types is not None else (None,)
+        return [(namespace, type) for namespace in namespaces for type in types]
+
+    def add(self, subscriber):
+        for key in self._keys(subscriber):
+            self._buckets.setdefault(key, set()).add(subscriber)
+        if subscriber.filter is not None:
+            self.filtered.add(subscriber)
+        self._matches.clear()
+
+    def remove(self, subscriber):
+        for key in self._keys(subscriber):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(subscriber)
+                if not bucket:
+                    del self._buckets[key]
+        self.filtered.discard(subscriber)
+        self._matches.clear()
+
+    def match(self, record) -> list:
+        """Return the subscribers that accept ``record``."""
+        namespace = _index_key(record.get("namespace"))
+        type = _index_key(record.get("type"))
+        try:
+            accepted, text_checked = self._matches[namespace, type]
+        except KeyError:
+            accepted, text_checked = self._matches_for(namespace, type)
+
+        if not text_checked:
+            return accepted
+        return accepted + [subscriber for subscriber in text_checked if subscriber.filter.matches_text(record)]
+
+    def _matches_for(self, namespace, type):
+        candidates = set()
+        for key in {(namespace, type), (namespace, None), (None, type), (None, None)}:
+            candidates.update(self._buckets.get(key, ()))
+
+        accepted = [subscriber for subscriber in candidates if subscriber.filter is None or subscriber.filter.text is None]
+        text_checked = [subscriber for subscriber in candidates if subscriber.filter is not None and subscriber.filter.text is not None]
+
+        if len(self._matches) >= self.MAX_CACHED_PAIRS:
+            self._matches.clear()
+        self._matches[namespace, type] = (accepted, text_checked)
+        return accepted, text_checked
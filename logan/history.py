@@ -0,0 +1,65 @@
+import sys
+from collections import deque
+from itertools import islice
+
+
+class LogHistory:
+    """Bounded store of the most recent log records, kept as encoded JSON with their event IDs.
+
+    Holds at most ``max_records`` entries and ``max_bytes`` of payload,
+    evicting the oldest first, so a long-running server uses a fixed amount
+    of memory no matter how many logs pass through it. Not thread-safe on its
+    own; the server mutates it under its broadcast lock.
+    """
+
+    def __init__(self, max_records: int = 10000, max_bytes: int = 16 * 1024 * 1024):
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self._entries = deque()
+        self._bytes = 0
+        self.appended = 0
+        self.evicted = 0
+
+    def append(self, event_id: int, payload: str):
+        """Add a record. Event IDs must increase by one with every call."""
+        self._entries.append((event_id, payload))
+        self._bytes += len(payload)
+        self.appended += 1
+
+        while self._entries and (len(self._entries) > self.max_records or self._bytes > self.max_bytes):
+            self._bytes -= len(self._entries.popleft()[1])
+            self.evicted += 1
+
+    def snapshot(self) -> list:
+        """Return the retained ``(event_id, payload)`` pairs, oldest first."""
+        return list(self._entries)
+
+    def since(self, last_event_id: int) -> list:
+        """Return the retained entries newer than ``last_event_id``, oldest first.
+
+        An ID ahead of the newest entry replays everything that is retained.
+        IDs from an earlier run of the server are told apart by the hub's
+        epoch, not here.
+        """
+        if not self._entries:
+            return []
+        if last_event_id > self._entries[-1][0]:
+            return list(self._entries)
+        start = max(0, last_event_id - self._entries[0][0] + 1)
+        return list(islice(self._entries, start, None))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "records": len(self._entries),
+            "payload_bytes": self._bytes,
+            # Payload plus per-string and container overhead
+            "memory_bytes": sum(sys.getsizeof(entry) + sys.getsizeof(entry[0]) + sys.getsizeof(entry[1]) for entry in self._entries)
+                            + sys.getsizeof(self._entries),
+            "max_records": self.max_records,
+            "max_bytes": self.max_bytes,
+            "appended": self.appended,
+            "evicted": self.evicted,
+        }
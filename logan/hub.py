@@ -0,0 +1,395 @@
+import json
+import os
+import threading
+import time
+import zlib
+from collections import deque
+from datetime import datetime
+from .filters import SubscriptionIndex
+from .history import LogHistory
+
+
+HEARTBEAT_FRAME = f"data: {json.dumps({'type': 'heartbeat'})}\n\n".encode('utf-8')
+
+
+def new_epoch() -> str:
+    """A token identifying one run of a hub, so IDs from a previous run are never taken for current ones."""
+    return os.urandom(4).hex()
+
+
+def sse_frame(event_id, payload, epoch):
+    """Encode one SSE event carrying an already-serialized JSON payload."""
+    return f"id: {epoch}-{event_id}\ndata: {payload}\n\n".encode('utf-8')
+
+
+def batch_frame(event_id, payloads, epoch):
+    """Encode one SSE event whose data is a JSON array of already-encoded payloads.
+
+    ``event_id`` is that of the newest record, so resuming after it skips
+    the whole batch.
+    """
+    head = b"data: [" if event_id is None else f"id: {epoch}-{event_id}\ndata: [".encode('ascii')
+    return head + b",".join(payloads) + b"]\n\n"
+
+
+def parse_event_id(value):
+    """Split an ``<epoch>-<number>`` event ID as sent by the hub. Returns ``(epoch, number)`` or None."""
+    epoch, _, number = (value or "").rpartition("-")
+    try:
+        return epoch, int(number)
+    except ValueError:
+        return None
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an ``Accept-Encoding`` header value allows a gzip response."""
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        return True
+    return False
+
+
+class GzipStream:
+    """Incremental gzip for an event stream.
+
+    The compressor's window persists across the connection, so the file
+    paths and function names repeated in every record compress against
+    earlier ones. Each chunk is sync-flushed so complete events reach the
+    browser immediately instead of waiting in the compressor.
+    """
+
+    def __init__(self, level: int = 6):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def parse_batch(body, mimetype):
+    """Parse a batch body given as a JSON array or as newline-delimited JSON.
+
+    Returns the list of valid records and the number of rejected entries.
+    """
+    text = body.decode('utf-8', errors='replace')
+
+    if mimetype != 'application/x-ndjson':
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            pass
+        else:
+            entries = payload if isinstance(payload, list) else [payload]
+            records = [entry for entry in entries if isinstance(entry, dict)]
+            return records, len(entries) - len(records)
+
+    # Fall back to one JSON object per line
+    records = []
+    rejected = 0
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            rejected += 1
+            continue
+        if isinstance(entry, dict):
+            records.append(entry)
+        else:
+            rejected += 1
+    return records, rejected
+
+
+def namespaces_payload(namespaces):
+    """JSON control record listing namespaces, for viewers whose filter hides some of them."""
+    return json.dumps({"type": "namespaces", "namespaces": sorted(namespaces)}).encode('utf-8')
+
+
+def skipped_payload(count):
+    """JSON record telling a viewer that ``count`` records were dropped because it fell behind."""
+    marker = {
+        "timestamp": datetime.now().isoformat(),
+        "type": "warning",
+        "message": f"{count} records skipped because this viewer fell behind",
+        "namespace": "logan",
+        "callstack": [],
+        "exception": None,
+        "skipped": count,
+    }
+    return json.dumps(marker).encode('utf-8')
+
+
+class Subscriber:
+    """A connected viewer's pending SSE frames.
+
+    The hub pushes frames from whichever thread ingested the log; the
+    viewer's stream takes them off with ``pop_all``. Subclasses decide how a
+    waiting stream is woken up.
+
+    At most ``max_pending`` frames are held. When a slow viewer hits the
+    limit, ``policy`` decides what happens: ``"drop_oldest"`` silently
+    discards the oldest frames, ``"coalesce"`` discards them too but tells
+    the viewer how many records it missed, and ``"disconnect"`` closes the
+    stream so the viewer reconnects and catches up from history.
+
+    Only records accepted by ``filter`` (a ``StreamFilter``) are queued; the
+    viewer is still told about new namespaces so it can offer them.
+
+    With ``batch=True`` everything queued is sent as one event whose data is
+    a JSON array, at most ``max_batch_records`` records or
+    ``max_batch_bytes`` of JSON at a time. After waking up, a batching
+    stream waits another ``batch_linger`` seconds so a burst lands in one
+    event rather than several.
+    """
+
+    POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+    def __init__(self, max_pending: int = 10000, policy: str = "coalesce", peer: str = None, batch: bool = False,
+                 max_batch_records: int = 1000, max_batch_bytes: int = 1024 * 1024, batch_linger: float = 0.01,
+                 filter=None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"policy must be one of {self.POLICIES}, got {policy!r}")
+
+        self.max_pending = max_pending
+        self.policy = policy
+        self.peer = peer
+        self.filter = filter
+        self.batch = batch
+        self.max_batch_records = max_batch_records
+        self.max_batch_bytes = max_batch_bytes
+        self.batch_linger = batch_linger if batch else 0
+        self.closed = False
+        # Set by LogHub.subscribe; part of the IDs in batch frames
+        self.epoch = None
+        self.connected_at = time.time()
+        self.last_pushed_id = 0
+        self.last_delivered_id = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.high_water = 0
+        self._skipped = 0
+        # (event_id, payload bytes, frame bytes) per record; control events have no ID
+        self._frames = deque()
+        self._lock = threading.Lock()
+
+    def push(self, event_id, payload, frame):
+        with self._lock:
+            if self.closed:
+                return
+            if event_id is not None:
+                self.last_pushed_id = event_id
+
+            if len(self._frames) >= self.max_pending:
+                if self.policy == "disconnect":
+                    self.dropped += len(self._frames) + 1
+                    self._frames.clear()
+                    self.closed = True
+                    self._notify()
+                    return
+                self._frames.popleft()
+                self.dropped += 1
+                if self.policy == "coalesce":
+                    self._skipped += 1
+
+            self._frames.append((event_id, payload, frame))
+            self.high_water = max(self.high_water, len(self._frames))
+        self._notify()
+
+    def pop_all(self) -> list:
+        """Take the queued frames: one per record, or a single array frame in batch mode."""
+        with self._lock:
+            if self.batch:
+                entries = self._take_batch()
+            else:
+                entries = list(self._frames)
+                self._frames.clear()
+            skipped, self._skipped = self._skipped, 0
+            more = bool(self._frames)
+
+        if more:
+            # Whatever did not fit in this batch goes out on the next wakeup
+            self._notify()
+        event_ids = [event_id for event_id, _, _ in entries if event_id is not None]
+        if event_ids:
+            self.last_delivered_id = event_ids[-1]
+            self.delivered += len(event_ids)
+
+        if self.batch:
+            payloads = [payload for _, payload, _ in entries]
+            if skipped:
+                payloads.insert(0, skipped_payload(skipped))
+            return [batch_frame(event_ids[-1] if event_ids else None, payloads, self.epoch)] if payloads else []
+
+        frames = [frame for _, _, frame in entries]
+        if skipped:
+            frames.insert(0, b"data: " + skipped_payload(skipped) + b"\n\n")
+        return frames
+
+    def _take_batch(self):
+        entries = []
+        size = 0
+        while self._frames and len(entries) < self.max_batch_records:
+            size += len(self._frames[0][1])
+            if entries and size > self.max_batch_bytes:
+                break
+            entries.append(self._frames.popleft())
+        return entries
+
+    def stats(self, last_event_id: int) -> dict:
+        return {
+            "peer": self.peer,
+            "filter": self.filter.describe() if self.filter else None,
+            "policy": self.policy,
+            "connected_seconds": round(time.time() - self.connected_at, 1),
+            "pending": len(self._frames),
+            "high_water": self.high_water,
+            "max_pending": self.max_pending,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            # Events published that this viewer has not been handed yet
+            "lag": max(0, last_event_id - self.last_delivered_id),
+        }
+
+    def _notify(self):
+        pass
+
+
+class ThreadSubscriber(Subscriber):
+    """Subscriber for streams served from a worker thread, which block while waiting."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._ready = threading.Event()
+
+    def _notify(self):
+        self._ready.set()
+
+    def wait(self, timeout: float) -> list:
+        """Block until frames are available or ``timeout`` passes, then take them all."""
+        if not self._frames and not self.closed:
+            self._ready.clear()
+            # Re-check after clearing so a push in between is not missed
+            if not self._frames and not self.closed:
+                self._ready.wait(timeout)
+        if self.batch_linger and self._frames and len(self._frames) < self.max_batch_records:
+            time.sleep(self.batch_linger)
+        return self.pop_all()
+
+
+class LogHub:
+    """Assigns event IDs to incoming logs, keeps recent history and fans frames out to subscribers.
+
+    This is the state shared by every server front end. ``publish`` may be
+    called from any thread; each record is serialized once and the same
+    frame bytes go to every subscriber.
+
+    ``subscriber_options`` (``max_pending`` and ``policy``) are what front
+    ends pass when they create a ``Subscriber`` for a new viewer.
+    """
+
+    def __init__(self, history_records: int = 10000, history_bytes: int = 16 * 1024 * 1024,
+                 max_pending: int = 10000, slow_consumer_policy: str = "coalesce"):
+        if slow_consumer_policy not in Subscriber.POLICIES:
+            raise ValueError(f"slow_consumer_policy must be one of {Subscriber.POLICIES}, got {slow_consumer_policy!r}")
+
+        self.subscriber_options = dict(max_pending=max_pending, policy=slow_consumer_policy)
+        self.history = LogHistory(max_records=history_records, max_bytes=history_bytes)
+        self.subscribers = set()
+        self.index = SubscriptionIndex()
+        self.namespaces = set()
+        self.last_event_id = 0
+        # Event IDs are "<epoch>-<number>": a viewer resuming with an ID from
+        # an earlier run of the server gets the whole history, even if the
+        # number happens to be in range again
+        self.epoch = new_epoch()
+        self._id_prefix = f"id: {self.epoch}-".encode('ascii')
+        self.lock = threading.Lock()
+
+    def publish(self, records):
+        """Record logs in history and push them to every subscriber under a single lock acquisition."""
+        if not records:
+            return
+
+        # Serialize outside the lock, and only once no matter how many viewers are connected
+        payloads = [json.dumps(log_data) for log_data in records]
+        with self.lock:
+            for log_data, payload in zip(records, payloads):
+                namespace = log_data.get("namespace")
+                if isinstance(namespace, str) and namespace not in self.namespaces:
+                    self.namespaces.add(namespace)
+                    self._announce_namespace(namespace)
+
+                self.last_event_id += 1
+                self.history.append(self.last_event_id, payload)
+                encoded = payload.encode('utf-8')
+                frame = b"%s%d\ndata: %s\n\n" % (self._id_prefix, self.last_event_id, encoded)
+                # Broadcast the same bytes to every subscriber whose filter accepts the record
+                for subscriber in self.index.match(log_data):
+                    subscriber.push(self.last_event_id, encoded, frame)
+
+    def _announce_namespace(self, namespace):
+        """Tell filtered viewers about a new namespace; unfiltered ones see it in the record itself."""
+        payload = namespaces_payload([namespace])
+        frame = b"data: %s\n\n" % payload
+        for subscriber in self.index.filtered:
+            subscriber.push(None, payload, frame)
+
+    def subscribe(self, subscriber: Subscriber, last_event_id=None) -> bytes:
+        """Register a subscriber and return the history it has missed as one block of frames.
+
+        ``last_event_id`` is an ``(epoch, number)`` pair from
+        ``parse_event_id``; one from another epoch replays all history.
+        Registering and taking the history snapshot under the same lock means
+        nothing is missed or repeated. A filtered subscriber only gets the
+        matching history, preceded by the list of every known namespace.
+        """
+        subscriber.epoch = self.epoch
+        with self.lock:
+            self.subscribers.add(subscriber)
+            self.index.add(subscriber)
+            if last_event_id is None or last_event_id[0] != self.epoch:
+                backlog = self.history.snapshot()
+            else:
+                backlog = self.history.since(last_event_id[1])
+            subscriber.last_delivered_id = self.last_event_id
+            namespaces = list(self.namespaces)
+
+        prefix = b""
+        if subscriber.filter is not None:
+            prefix = b"data: %s\n\n" % namespaces_payload(namespaces)
+            backlog = [(event_id, payload) for event_id, payload in backlog
+                       if subscriber.filter.matches(json.loads(payload))]
+
+        if not subscriber.batch:
+            return prefix + b"".join(sse_frame(event_id, payload, self.epoch) for event_id, payload in backlog)
+        step = subscriber.max_batch_records
+        return prefix + b"".join(
+            batch_frame(backlog[min(offset + step, len(backlog)) - 1][0],
+                        [payload.encode('utf-8') for _, payload in backlog[offset:offset + step]], self.epoch)
+            for offset in range(0, len(backlog), step)
+        )
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.discard(subscriber)
+                self.index.remove(subscriber)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'history': self.history.stats(),
+                'clients': len(self.subscribers),
+                'viewers': [subscriber.stats(self.last_event_id) for subscriber in self.subscribers],
+                'last_event_id': self.last_event_id,
+                'epoch': self.epoch,
+            }
@@ -0,0 +1,82 @@
+# Numeric severities for log types, aligned with the logging module
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVELS = {
+    "debug": DEBUG,
+    "info": INFO,
+    "warning": WARNING,
+    "error": ERROR,
+}
+
+
+def level_number(level) -> int:
+    """Convert a log type name ("warn" is accepted for "warning") or a logging-style int to a severity."""
+    if isinstance(level, bool):
+        raise ValueError(f"Invalid log level: {level!r}")
+    if isinstance(level, int):
+        return level
+    name = "warning" if level == "warn" else level
+    if name not in LEVELS:
+        raise ValueError(f"Log level must be one of {sorted(LEVELS)} or an int, got {level!r}")
+    return LEVELS[name]
+
+
+class CallstackPolicy:
+    """Decides how much of the callstack to capture for each log type and namespace.
+
+    A level is ``"none"``, ``"caller"`` (innermost frame only), ``"full"``,
+    or an int N for the top N frames. Rules may name a type, a namespace or
+    both; ``None`` matches anything. The most specific matching rule wins:
+    type and namespace, then namespace alone, then type alone, then the
+    default. Resolved limits are cached per (type, namespace) pair, so the
+    lookup on the logging path is a single dict access.
+    """
+
+    _NAMED_LEVELS = {"none": 0, "caller": 1, "full": None}
+
+    def __init__(self, default="full", rules: dict = None):
+        self._default = self._to_limit(default)
+        self._rules = {}
+        self._cache = {}
+        for key, level in (rules or {}).items():
+            type, namespace = key if isinstance(key, tuple) else (key, None)
+            self.set(level, type=type, namespace=namespace)
+
+    @classmethod
+    def _to_limit(cls, level):
+        if isinstance(level, bool) or not isinstance(level, (str, int)):
+            raise ValueError(f"Invalid callstack level: {level!r}")
+        if isinstance(level, int):
+            if level < 0:
+                raise ValueError(f"Callstack frame count must be non-negative, got {level}")
+            return level
+        if level not in cls._NAMED_LEVELS:
+            raise ValueError(f"Callstack level must be one of {sorted(cls._NAMED_LEVELS)} or an int, got {level!r}")
+        return cls._NAMED_LEVELS[level]
+
+    def set(self, level, type: str = None, namespace: str = None):
+        """Set the capture level for a type and/or namespace (``None`` for all)."""
+        limit = self._to_limit(level)
+        if type is None and namespace is None:
+            self._default = limit
+        else:
+            self._rules[(type, namespace)] = limit
+        self._cache = {}
+
+    def _resolve(self, type: str, namespace: str):
+        for key in ((type, namespace), (None, namespace), (type, None)):
+            if key in self._rules:
+                return self._rules[key]
+        return self._default
+
+    def limit(self, type: str, namespace: str):
+        """Number of frames to capture, or ``None`` for the whole stack."""
+        key = (type, namespace)
+        try:
+            return self._cache[key]
+        except KeyError:
+            limit = self._cache[key] = self._resolve(type, namespace)
+            return limit
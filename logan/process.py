@@ -0,0 +1,137 @@
+import multiprocessing
+import threading
+import time
+
+SERVER_MODES = ("waitress", "asyncio")
+
+
+def _run_server_in_subprocess(options, ready, listen_socket):
+    # Flask and waitress are only ever imported here, in the server child
+    from .server import LoganServer
+    server = LoganServer(listen_socket=listen_socket, **options)
+    server._run_direct(ready=ready)
+
+
+def _wait_ready(ready, runner, timeout):
+    """Wait for ``ready``, giving up early if ``runner`` (a process or thread) has died."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while not ready.is_set():
+        if not runner.is_alive():
+            return ready.is_set()
+        remaining = 0.05 if deadline is None else min(0.05, deadline - time.monotonic())
+        if remaining <= 0:
+            return False
+        ready.wait(remaining)
+    return True
+
+
+class ServerProcess:
+    """Starts and supervises a ``LoganServer`` in a child process.
+
+    Holds only the server's constructor arguments, so the logging process
+    never imports the web stack; the child builds the real server from them.
+    """
+
+    def __init__(self, listen_socket=None, **options):
+        mode = options.get("mode", "waitress")
+        if mode not in SERVER_MODES:
+            raise ValueError(f"mode must be one of {SERVER_MODES}, got {mode!r}")
+
+        self.options = options
+        self.listen_socket = listen_socket
+        self.process = None
+        self.ready = None
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process is not None else None
+
+    def run(self):
+        if self.process is not None and self.process.is_alive():
+            return
+
+        self.ready = multiprocessing.Event()
+        self.process = multiprocessing.Process(target=_run_server_in_subprocess,
+                                               args=(self.options, self.ready, self.listen_socket))
+        self.process.daemon = True
+        self.process.start()
+        if self.listen_socket is not None:
+            # The child has its own copy of the socket now
+            self.listen_socket.close()
+
+    def wait_ready(self, timeout=None) -> bool:
+        """Wait until the child process is accepting connections.
+
+        Returns False if ``timeout`` seconds pass first or the process exits
+        without getting there.
+        """
+        if self.ready is None:
+            return False
+        return _wait_ready(self.ready, self.process, timeout)
+
+    def stop(self):
+        print("Stopping server")
+        if self.process and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.kill()
+
+
+class ServerThread:
+    """Runs a ``LoganServer`` on a daemon thread of the current process.
+
+    For notebooks and single-process tools: there is no child process to
+    spawn, and ``server.hub`` can be published to directly. The server runs
+    until the process exits.
+    """
+
+    def __init__(self, listen_socket=None, **options):
+        # Unlike ServerProcess, this process does serve, so the web stack is needed here
+        from .server import LoganServer
+        self.server = LoganServer(listen_socket=listen_socket, **options)
+        self.thread = None
+        self.ready = threading.Event()
+
+    def run(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        self.thread = threading.Thread(target=self.server._run_direct, kwargs={"ready": self.ready},
+                                       name="logan-server", daemon=True)
+        self.thread.start()
+
+    def wait_ready(self, timeout=None) -> bool:
+        """Wait until the server thread is accepting connections.
+
+        Returns False if ``timeout`` seconds pass first or the thread dies
+        without getting there.
+        """
+        if self.thread is None:
+            return False
+        return _wait_ready(self.ready, self.thread, timeout)
+
+
+class InProcessTransport:
+    """Hands log batches straight to a ``LogHub`` served from the same process.
+
+    Records stay Python objects until the hub serializes each of them once
+    to build its SSE frame; there is no HTTP request or JSON decode on ingest.
+    """
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.sent = 0
+
+    def send_batch(self, batch: list):
+        self.hub.publish(batch)
+        self.sent += len(batch)
+
+    def stats(self) -> dict:
+        return {
+            "in_process": True,
+            "sent": self.sent,
+        }
+
+    def close(self):
+        pass
@@ -0,0 +1,101 @@
+import threading
+import time
+from queue import Queue, Empty, Full
+
+
+class LogSender:
+    """Ships log records to the server from a background daemon thread.
+
+    ``submit`` only appends to a bounded in-process queue, so the calling
+    thread never waits on the network. The worker thread drains the queue
+    and hands records to ``send_batch`` in batches of up to ``batch_size``,
+    holding the first record of a batch for at most ``linger`` seconds while
+    it waits for more to arrive.
+    """
+
+    def __init__(self, send_batch, max_queue_size: int = 10000, batch_size: int = 100, linger: float = 0.05):
+        self._send_batch = send_batch
+        self._queue = Queue(maxsize=max_queue_size)
+        self.batch_size = batch_size
+        self.linger = linger
+        self.submitted = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failed = 0
+        self.last_error = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._thread = threading.Thread(target=self._run, name="logan-sender", daemon=True)
+        self._thread.start()
+
+    def submit(self, record) -> bool:
+        """Queue a record for sending. Returns False if the queue is full and the record was dropped."""
+        try:
+            self._queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """Block until every queued record has been handed to ``send_batch``."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        return {
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "pending": self.pending(),
+            "batches": self.batches,
+            "failed": self.failed,
+            "last_error": self.last_error,
+        }
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.batch_size:
+            try:
+                # Take whatever is already queued without touching the clock
+                batch.append(self._queue.get_nowait())
+                continue
+            except Empty:
+                pass
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._send_batch(batch)
+                self.batches += 1
+            except Exception as e:
+                # Never let a bad batch kill the sender thread, but account for what it lost
+                self.failed += len(batch)
+                self.last_error = repr(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
@@ -1,27 +1,42 @@
 import json
 import threading
-from queue import Queue
-from flask import Flask, render_template_string, request, Response, send_from_directory
-from importlib import resources
+import time
+from flask import Flask, render_template_string, request, Response
 import os
-from waitress import serve
-import multiprocessing
+from waitress import create_server
 import atexit
 import signal
-
-
-def _run_server_in_subprocess(port):
-    server = LoganServer(port)
-    server._run_direct()
+from .process import SERVER_MODES, ServerProcess
+from .shm import ShmRingBuffer
+from .static import StaticAssets
+from .filters import StreamFilter
+from .hub import LogHub, ThreadSubscriber, GzipStream, HEARTBEAT_FRAME, accepts_gzip, parse_batch, parse_event_id
 
 
 class LoganServer:
-    def __init__(self, port=5000):
+    MODES = SERVER_MODES
+    
+    def __init__(self, port=5000, listen_socket=None, shm_name=None, shm_poll_interval=0.005, unix_socket=None,
+                 history_records=10000, history_bytes=16 * 1024 * 1024, mode="waitress",
+                 max_pending=10000, slow_consumer_policy="coalesce"):
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}, got {mode!r}")
+        
+        # Constructor arguments, replayed to build the server in the child process
+        self.options = dict(port=port, shm_name=shm_name, shm_poll_interval=shm_poll_interval, unix_socket=unix_socket,
+                            history_records=history_records, history_bytes=history_bytes, mode=mode,
+                            max_pending=max_pending, slow_consumer_policy=slow_consumer_policy)
+        # An already-bound TCP socket to serve on instead of binding ``port``
+        self.listen_socket = listen_socket
         self.port = port
+        self.unix_socket = unix_socket
+        self.shm_name = shm_name
+        self.shm_poll_interval = shm_poll_interval
+        self.mode = mode
         self.app = Flask(__name__)
-        self.log_queue = Queue()
-        self.clients = set()
-        self.lock = threading.Lock()
+        self.hub = LogHub(history_records=history_records, history_bytes=history_bytes,
+                          max_pending=max_pending, slow_consumer_policy=slow_consumer_policy)
+        self.assets = StaticAssets.load()
         self.process = None
         
         # Setup routes
@@ -36,60 +51,104 @@ class LoganServer:
         @self.app.route('/api/log', methods=['POST'])
         def receive_log():
             log_data = request.get_json()
-            
-            # Add log to queue and notify all clients
-            with self.lock:
-                self.log_queue.put(log_data)
-                # Broadcast to all connected clients
-                for client_queue in self.clients:
-                    try:
-                        client_queue.put(log_data)
-                    except:
-                        pass
-            
+            if not isinstance(log_data, dict):
+                return {'error': 'log record must be a JSON object'}, 400
+            self.hub.publish([log_data])
             return {'status': 'ok'}, 200
         
+        @self.app.route('/api/logs/batch', methods=['POST'])
+        def receive_log_batch():
+            records, rejected = parse_batch(request.get_data(), request.mimetype)
+            self.hub.publish(records)
+            return {'status': 'ok', 'accepted': len(records), 'rejected': rejected}, 200
+        
         @self.app.route('/api/logs/stream')
         def stream_logs():
-            def generate():
-                client_queue = Queue()
-                
-                # Add this client to the clients set
-                with self.lock:
-                    self.clients.add(client_queue)
+            # Browsers resend the last seen ID when reconnecting on their own;
+            # app.js reconnects manually and passes it as a query parameter
+            last_event_id = parse_event_id(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+            peer = request.remote_addr
+            batch = request.args.get('batch') == '1'
+            gzip = accepts_gzip(request.headers.get('Accept-Encoding'))
+            try:
+                stream_filter = StreamFilter.from_args(request.args)
+            except ValueError as e:
+                return {'error': str(e)}, 400
+            
+            def events():
+                subscriber = ThreadSubscriber(peer=peer, batch=batch, filter=stream_filter,
+                                              **self.hub.subscriber_options)
+                backlog = self.hub.subscribe(subscriber, last_event_id)
                 
                 try:
+                    # Replay missed history in one burst
+                    if backlog:
+                        yield backlog
+                    
                     while True:
-                        try:
-                            log_data = client_queue.get(timeout=30)  # 30 second timeout
-                            yield f"data: {json.dumps(log_data)}\n\n"
-                        except Exception:
+                        frames = subscriber.wait(timeout=30)  # 30 second timeout
+                        if subscriber.closed:
+                            # Dropped as a slow consumer; the viewer reconnects and resumes from history
+                            break
+                        if frames:
+                            yield b"".join(frames)
+                        else:
                             # Send heartbeat to keep connection alive
-                            yield f"data: {json.dumps({'type': 'heartbeat'})}\n\n"
+                            yield HEARTBEAT_FRAME
                 except GeneratorExit:
                     pass
                 finally:
                     # Remove client when connection closes
-                    with self.lock:
-                        self.clients.discard(client_queue)
+                    self.hub.unsubscribe(subscriber)
+            
+            def generate():
+                if not gzip:
+                    yield from events()
+                    return
+                # Flushed after every write, so compressed events still arrive as they happen
+                stream = GzipStream()
+                for chunk in events():
+                    yield stream.compress(chunk)
             
             response = Response(generate(), mimetype='text/event-stream')
             response.headers['Cache-Control'] = 'no-cache'
+            response.headers['Vary'] = 'Accept-Encoding'
+            if gzip:
+                response.headers['Content-Encoding'] = 'gzip'
             response.headers['Access-Control-Allow-Origin'] = '*'
             return response
         
+        @self.app.route('/api/stats')
+        def stats():
+            return self.stats()
+        
         @self.app.route('/web_ui/<path:filename>')
         def serve_static(filename):
-            web_ui_dir = str(resources.files('logan') / 'web_ui')
-            return send_from_directory(web_ui_dir, filename)
+            return self.serve_asset(filename)
+    
+    def stats(self):
+        return self.hub.stats()
     
     def serve_web_ui(self):
-        web_ui_file = resources.files('logan') / 'web_ui' / 'index.html'
-        return web_ui_file.read_text(encoding='utf-8')
+        return self.serve_asset('index.html')
+    
+    def serve_asset(self, filename):
+        result = self.assets.respond(filename, if_none_match=request.headers.get('If-None-Match'),
+                                     accept_encoding=request.headers.get('Accept-Encoding'),
+                                     version=request.args.get('v'))
+        if result is None:
+            return {'error': 'not found'}, 404
+        status, headers, body = result
+        return Response(body, status=status, headers=headers)
     
     
     def _graceful_exit(self):
         # Avoid heavy work in a signal handler; just exit the child proc.
+        if self.unix_socket:
+            try:
+                os.unlink(self.unix_socket)
+            except OSError:
+                pass
         os._exit(0)
     
     def _setup_cleanup(self):
@@ -101,21 +160,61 @@ class LoganServer:
             signal.signal(signal.SIGINT,  lambda s, f: self._graceful_exit())
         # No atexit hooks in the parent; avoid blocking joins at interpreter teardown.
     
-    def _run_direct(self):
-        serve(self.app, host='0.0.0.0', port=self.port, threads=6)
+    def _drain_shared_memory(self, ring):
+        """Move records written by the client into the broadcast path, one bulk read at a time."""
+        while True:
+            payloads = ring.read_all()
+            if not payloads:
+                time.sleep(self.shm_poll_interval)
+                continue
+            
+            records = []
+            for payload in payloads:
+                try:
+                    records.append(json.loads(payload))
+                except ValueError:
+                    pass
+            self.hub.publish(records)
+    
+    def _start_shm_reader(self):
+        ring = ShmRingBuffer.attach(self.shm_name)
+        # Both processes have the segment mapped now; drop the name so it
+        # cannot leak if either side dies without cleaning up
+        ring.unlink()
+        threading.Thread(target=self._drain_shared_memory, args=(ring,), name="logan-shm-reader", daemon=True).start()
     
-    def run(self):
-        if self.process is not None and self.process.is_alive():
+    def _run_direct(self, ready=None):
+        """Serve in the current process. ``ready`` is set once every listening socket is bound."""
+        if self.shm_name:
+            self._start_shm_reader()
+        if self.mode == "asyncio":
+            from .aio_server import AsyncLoganServer
+            AsyncLoganServer(self.hub, port=self.port, sock=self.listen_socket, unix_socket=self.unix_socket,
+                             assets=self.assets).serve_forever(on_ready=ready.set if ready else None)
             return
-        
-        self.process = multiprocessing.Process(target=_run_server_in_subprocess, args=(self.port,))
-        self.process.daemon = True
-        self.process.start()
+        if self.unix_socket:
+            # waitress cannot mix TCP and Unix sockets in one server, so the
+            # Unix listener gets its own server and thread pool
+            unix_server = create_server(self.app, unix_socket=self.unix_socket, threads=2)
+            threading.Thread(target=unix_server.run, name="logan-unix-socket", daemon=True).start()
+        # create_server binds immediately, so connections made after this are accepted
+        if self.listen_socket is not None:
+            tcp_server = create_server(self.app, sockets=[self.listen_socket], threads=6)
+        else:
+            tcp_server = create_server(self.app, host='0.0.0.0', port=self.port, threads=6)
+        if ready is not None:
+            ready.set()
+        tcp_server.run()
+    
+    def run(self):
+        """Serve from a child process; this object keeps handling nothing itself."""
+        if self.process is None:
+            self.process = ServerProcess(listen_socket=self.listen_socket, **self.options)
+        self.process.run()
+    
+    def wait_ready(self, timeout=None) -> bool:
+        return self.process is not None and self.process.wait_ready(timeout)
     
     def stop(self):
-        print("Stopping server")
-        if self.process and self.process.is_alive():
-            self.process.terminate()
-            self.process.join(timeout=5)
-            if self.process.is_alive():
-                self.process.kill()
\ No newline at end of file
+        if self.process is not None:
+            self.process.stop()
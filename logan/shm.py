@@ -0,0 +1,147 @@
+import json
+import struct
+from multiprocessing import shared_memory
+
+
+class ShmRingBuffer:
+    """Single-producer, single-consumer byte ring in ``multiprocessing.shared_memory``.
+
+    Records are stored as a 4-byte little-endian length followed by the
+    payload, wrapping around the end of the data region. Two monotonically
+    increasing byte counters live in the header: ``head`` is written only by
+    the producer and ``tail`` only by the consumer, so neither side needs a
+    lock. Each side publishes its counter after copying data, once per batch.
+    """
+
+    _COUNTER = struct.Struct("<Q")
+    _LENGTH = struct.Struct("<I")
+    # head and tail sit on separate cache lines so the two processes don't contend
+    _HEAD_OFFSET = 0
+    _TAIL_OFFSET = 64
+    _DATA_OFFSET = 128
+
+    def __init__(self, shm: shared_memory.SharedMemory):
+        self._shm = shm
+        self._buf = shm.buf
+        self.capacity = shm.size - self._DATA_OFFSET
+        # Each side caches the counter it owns
+        self._head = self._load(self._HEAD_OFFSET)
+        self._tail = self._load(self._TAIL_OFFSET)
+
+    @classmethod
+    def create(cls, capacity: int = 8 * 1024 * 1024):
+        shm = shared_memory.SharedMemory(create=True, size=capacity + cls._DATA_OFFSET)
+        shm.buf[:cls._DATA_OFFSET] = bytes(cls._DATA_OFFSET)
+        return cls(shm)
+
+    @classmethod
+    def attach(cls, name: str):
+        return cls(shared_memory.SharedMemory(name=name))
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def _load(self, offset: int) -> int:
+        return self._COUNTER.unpack_from(self._buf, offset)[0]
+
+    def _store(self, offset: int, value: int):
+        self._COUNTER.pack_into(self._buf, offset, value)
+
+    def _copy_in(self, position: int, data):
+        start = position % self.capacity
+        end = start + len(data)
+        base = self._DATA_OFFSET
+        if end <= self.capacity:
+            self._buf[base + start:base + end] = data
+        else:
+            split = self.capacity - start
+            view = memoryview(data)
+            self._buf[base + start:base + self.capacity] = view[:split]
+            self._buf[base:base + len(data) - split] = view[split:]
+
+    def _copy_out(self, position: int, size: int) -> bytes:
+        start = position % self.capacity
+        end = start + size
+        base = self._DATA_OFFSET
+        if end <= self.capacity:
+            return bytes(self._buf[base + start:base + end])
+        split = self.capacity - start
+        return bytes(self._buf[base + start:base + self.capacity]) + bytes(self._buf[base:base + size - split])
+
+    def write_many(self, payloads) -> int:
+        """Append payloads in order until one does not fit. Returns how many were written. Producer only."""
+        head = self._head
+        free = self.capacity - (head - self._load(self._TAIL_OFFSET))
+        written = 0
+        for payload in payloads:
+            size = self._LENGTH.size + len(payload)
+            if size > free:
+                break
+            self._copy_in(head, self._LENGTH.pack(len(payload)))
+            self._copy_in(head + self._LENGTH.size, payload)
+            head += size
+            free -= size
+            written += 1
+
+        if written:
+            self._head = head
+            self._store(self._HEAD_OFFSET, head)
+        return written
+
+    def read_all(self) -> list:
+        """Remove and return every complete record currently in the ring. Consumer only."""
+        tail = self._tail
+        head = self._load(self._HEAD_OFFSET)
+        payloads = []
+        while tail < head:
+            (size,) = self._LENGTH.unpack(self._copy_out(tail, self._LENGTH.size))
+            payloads.append(self._copy_out(tail + self._LENGTH.size, size))
+            tail += self._LENGTH.size + size
+
+        if payloads:
+            self._tail = tail
+            self._store(self._TAIL_OFFSET, tail)
+        return payloads
+
+    def used(self) -> int:
+        return self._load(self._HEAD_OFFSET) - self._load(self._TAIL_OFFSET)
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+
+    def unlink(self):
+        self._shm.unlink()
+
+
+class ShmTransport:
+    """Ships log batches to a ``LoganServer`` child process through a ``ShmRingBuffer``.
+
+    ``send_batch`` must only be called from one thread (the sender thread),
+    since the ring supports a single producer. Records that do not fit
+    because the server has fallen behind are dropped and counted.
+    """
+
+    def __init__(self, ring: ShmRingBuffer):
+        self.ring = ring
+        self.sent = 0
+        self.dropped = 0
+
+    def send_batch(self, batch: list):
+        payloads = [json.dumps(log_entry).encode("utf-8") for log_entry in batch]
+        written = self.ring.write_many(payloads)
+        self.sent += written
+        self.dropped += len(payloads) - written
+
+    def stats(self) -> dict:
+        return {
+            "shm_name": self.ring.name,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "ring_used": self.ring.used(),
+            "ring_capacity": self.ring.capacity,
+        }
+
+    def close(self):
+        self.ring.close()
@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+import mimetypes
+import re
+from importlib import resources
+
+from .hub import accepts_gzip
+
+
+# Fingerprinted URLs never change content, so browsers may keep them for a year
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Anything else, index.html included, is revalidated with its ETag on every load
+REVALIDATE = "no-cache"
+
+
+def _version(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+class StaticAsset:
+    """One web UI file held in memory, with its gzip variant and strong ETags precomputed."""
+
+    def __init__(self, name: str, body: bytes):
+        self.name = name
+        self.body = body
+        self.version = _version(body)
+        self.etag = f'"{self.version}"'
+
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/javascript':
+            content_type += '; charset=utf-8'
+        self.content_type = content_type
+
+        # mtime=0 keeps the compressed bytes, and so the ETag, stable across restarts
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        self.gzip_body = compressed if len(compressed) < len(body) else None
+        self.gzip_etag = f'"{self.version}-gz"'
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # If-None-Match uses weak comparison
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class StaticAssets:
+    """The web UI, loaded from package resources once and served from memory.
+
+    ``index.html`` references the other assets with a ``?v=<content hash>``
+    query string, so requests carrying the current version can be cached
+    for good while a new release is picked up on the next page load.
+    """
+
+    def __init__(self, assets: dict):
+        self._assets = assets
+
+    @classmethod
+    def load(cls):
+        assets = {}
+
+        def walk(directory, prefix):
+            for entry in directory.iterdir():
+                if entry.is_dir():
+                    if entry.name != '__pycache__':
+                        walk(entry, f"{prefix}{entry.name}/")
+                elif not entry.name.endswith(('.py', '.pyc')):
+                    assets[prefix + entry.name] = entry.read_bytes()
+
+        walk(resources.files('logan') / 'web_ui', "")
+        versions = {name: _version(body) for name, body in assets.items()}
+
+        def fingerprint(match):
+            name = match.group(2)
+            if name not in versions:
+                return match.group(0)
+            return f'{match.group(1)}/web_ui/{name}?v={versions[name]}{match.group(3)}'
+
+        index = assets.get('index.html')
+        if index is not None:
+            text = re.sub(r'((?:src|href)=")/web_ui/([^"?]+)(")', fingerprint, index.decode('utf-8'))
+            assets['index.html'] = text.encode('utf-8')
+
+        return cls({name: StaticAsset(name, body) for name, body in assets.items()})
+
+    def get(self, name: str):
+        return self._assets.get(name)
+
+    def respond(self, name: str, if_none_match: str = None, accept_encoding: str = None, version: str = None):
+        """Build the response for an asset as ``(status, headers, body)``, or None if there is no such asset.
+
+        The arguments are the request's ``If-None-Match`` and
+        ``Accept-Encoding`` headers and its ``v`` query parameter.
+        """
+        asset = self._assets.get(name)
+        if asset is None:
+            return None
+
+        use_gzip = asset.gzip_body is not None and accepts_gzip(accept_encoding)
+        etag = asset.gzip_etag if use_gzip else asset.etag
+        response_headers = {
+            'ETag': etag,
+            'Cache-Control': IMMUTABLE if version == asset.version else REVALIDATE,
+            'Vary': 'Accept-Encoding',
+        }
+
+        if _etag_matches(if_none_match, etag):
+            return 304, response_headers, b""
+
+        response_headers['Content-Type'] = asset.content_type
+        if use_gzip:
+            response_headers['Content-Encoding'] = 'gzip'
+            return 200, response_headers, asset.gzip_body
+        return 200, response_headers, asset.body
@@ -0,0 +1,270 @@
+import socket
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+
+
+class CircuitBreaker:
+    """Stops send attempts after repeated failures and probes for recovery with exponential backoff.
+
+    The breaker starts ``closed``. After ``failure_threshold`` consecutive
+    failures it opens and rejects sends until the backoff delay has passed,
+    then lets a single probe through (``half_open``). A successful probe
+    closes it again; a failed one reopens it with double the delay, up to
+    ``max_backoff`` seconds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, base_backoff: float = 0.5, max_backoff: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.times_opened = 0
+        self.backoff = 0.0
+        self._next_probe = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return True if a send should be attempted right now."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() < self._next_probe:
+                    return False
+                self.state = self.HALF_OPEN
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.backoff = 0.0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+
+            if self.state == self.HALF_OPEN:
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+            elif self.consecutive_failures >= self.failure_threshold:
+                self.backoff = self.base_backoff
+                self.times_opened += 1
+            else:
+                return
+
+            self.state = self.OPEN
+            self._next_probe = time.monotonic() + self.backoff
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "total_failures": self.total_failures,
+                "times_opened": self.times_opened,
+                "backoff": self.backoff,
+                "next_probe_in": max(0.0, self._next_probe - time.monotonic()) if self.state == self.OPEN else 0.0,
+            }
+
+
+class HttpTransport:
+    """Sends log batches to the Logan server over a pool of keep-alive HTTP connections.
+
+    A single ``requests.Session`` is shared by every caller and thread, so
+    connections are reused instead of being opened per request. If the server
+    process restarts, the pooled sockets go stale; the first failed send drops
+    the pool, reconnects and retries the batch once.
+
+    Sends go through a ``CircuitBreaker``. While it is open, batches are not
+    sent at all: with ``fallback="buffer"`` they are kept (up to
+    ``fallback_buffer_size`` records) and replayed once the server recovers,
+    with ``fallback="console"`` they are passed to ``console`` instead, and
+    with ``fallback="drop"`` they are discarded.
+    """
+
+    FALLBACKS = ("buffer", "console", "drop")
+
+    def __init__(self, base_url: str, pool_size: int = 4, timeout: float = 1.0, breaker: CircuitBreaker = None,
+                 fallback: str = "buffer", fallback_buffer_size: int = 10000, console=None):
+        if fallback not in self.FALLBACKS:
+            raise ValueError(f"fallback must be one of {self.FALLBACKS}, got {fallback!r}")
+
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.fallback = fallback
+        self.console = console
+        self.reconnects = 0
+        self.sent = 0
+        self.fallen_back = 0
+        self.dropped = 0
+        self._backlog = deque()
+        self._backlog_size = fallback_buffer_size
+        self._lock = threading.Lock()
+        self._session = self._new_session()
+
+    def _new_adapter(self):
+        return HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+
+    def _new_session(self):
+        session = requests.Session()
+        session.mount("http://", self._new_adapter())
+        return session
+
+    def reconnect(self, base_url: str = None):
+        """Drop every pooled connection and start over, optionally against a new server URL."""
+        with self._lock:
+            old_session = self._session
+            if base_url is not None:
+                self.base_url = base_url
+            self._session = self._new_session()
+            self.reconnects += 1
+        old_session.close()
+
+    def _post(self, batch: list):
+        return self._session.post(f"{self.base_url}/api/logs/batch", json=batch, timeout=self.timeout)
+
+    def _deliver(self, batch: list) -> bool:
+        """Make one send attempt (plus one reconnect) and report the outcome to the breaker."""
+        try:
+            try:
+                response = self._post(batch)
+            except requests.exceptions.ConnectionError:
+                # The server may have restarted underneath a pooled connection
+                self.reconnect()
+                response = self._post(batch)
+        except requests.exceptions.RequestException:
+            self.breaker.record_failure()
+            return False
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            return False
+
+        self.breaker.record_success()
+        if response.status_code != 200:
+            print(f"Failed to send logs: {response.status_code}")
+        self.sent += len(batch)
+        return True
+
+    def _fall_back(self, batch: list):
+        self.fallen_back += len(batch)
+
+        if self.fallback == "buffer":
+            overflow = len(self._backlog) + len(batch) - self._backlog_size
+            if overflow > 0:
+                # Keep the newest records; the oldest are the least useful
+                for _ in range(min(overflow, len(self._backlog))):
+                    self._backlog.popleft()
+                self.dropped += overflow
+                batch = batch[-self._backlog_size:]
+            self._backlog.extend(batch)
+        elif self.fallback == "console" and self.console is not None:
+            for log_entry in batch:
+                self.console(log_entry)
+        else:
+            self.dropped += len(batch)
+
+    def _replay_backlog(self, chunk_size: int) -> bool:
+        """Resend buffered records oldest first. Returns False if the server failed again."""
+        while self._backlog:
+            chunk = [self._backlog.popleft() for _ in range(min(chunk_size, len(self._backlog)))]
+            if not self._deliver(chunk):
+                self._backlog.extendleft(reversed(chunk))
+                return False
+        return True
+
+    def send_batch(self, batch: list):
+        """Send a batch of log entries to the server in one request, honouring the circuit breaker."""
+        if not self.breaker.allow():
+            self._fall_back(batch)
+            return
+
+        if self._backlog and not self._replay_backlog(max(len(batch), 500)):
+            self._fall_back(batch)
+            return
+
+        if not self._deliver(batch):
+            self._fall_back(batch)
+
+    def stats(self) -> dict:
+        return {
+            "url": self.base_url,
+            "sent": self.sent,
+            "fallback": self.fallback,
+            "fallen_back": self.fallen_back,
+            "buffered": len(self._backlog),
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+            "breaker": self.breaker.stats(),
+        }
+
+    def close(self):
+        self._session.close()
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    """HTTP connection that talks to a Unix domain socket instead of a TCP port."""
+
+    def __init__(self, *args, socket_path: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.socket_path = socket_path
+
+    def _new_conn(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+
+class _UnixConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _UnixHTTPConnection
+
+
+class _UnixAdapter(HTTPAdapter):
+    """Transport adapter that routes every request through one Unix socket connection pool."""
+
+    def __init__(self, socket_path: str, pool_size: int):
+        super().__init__(max_retries=0)
+        self._pool = _UnixConnectionPool("localhost", maxsize=pool_size, socket_path=socket_path)
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        return self._pool
+
+    def get_connection(self, url, proxies=None):
+        return self._pool
+
+    def close(self):
+        self._pool.close()
+        super().close()
+
+
+class UnixSocketTransport(HttpTransport):
+    """``HttpTransport`` that reaches the server over a Unix domain socket, bypassing the TCP loopback stack."""
+
+    def __init__(self, socket_path: str, **kwargs):
+        self.socket_path = socket_path
+        super().__init__("http://localhost", **kwargs)
+
+    def _new_adapter(self):
+        return _UnixAdapter(self.socket_path, self.pool_size)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["unix_socket"] = self.socket_path
+        return stats
@@ -11,6 +11,10 @@ class LogViewer {
         this.maxReconnectAttempts = 10;
         this.reconnectTimeout = null;
         this.logCounter = 0; // Monotonically increasing log index
+        this.lastEventId = null; // Server-assigned ID of the last received log, used to resume after reconnecting
+        this.clearedThroughId = null; // lastEventId when logs were last cleared; filter changes replay history from here
+        this.subscriptionQuery = ''; // Filter parameters of the open stream
+        this.resubscribeTimeout = null;
 
 
         this.initializeElements();
@@ -86,6 +90,7 @@ class LogViewer {
         });
         
         this.clearLogsBtn.addEventListener('click', () => {
+            this.clearedThroughId = this.lastEventId;
             this.logs = [];
             this.filteredLogs = [];
             this.renderLogs();
@@ -134,7 +139,14 @@ class LogViewer {
             this.reconnectTimeout = null;
         }
         
-        this.eventSource = new EventSource('/api/logs/stream');
+        // Ask for batched events matching the current filters, and resume
+        // where we left off; the server replays anything we missed
+        this.subscriptionQuery = this.filterQuery();
+        let streamUrl = `/api/logs/stream?batch=1${this.subscriptionQuery}`;
+        if (this.lastEventId !== null) {
+            streamUrl += `&last_event_id=${encodeURIComponent(this.lastEventId)}`;
+        }
+        this.eventSource = new EventSource(streamUrl);
         
         this.eventSource.onopen = () => {
             console.log('EventSource connected');
@@ -143,9 +155,22 @@ class LogViewer {
         };
         
         this.eventSource.onmessage = (event) => {
+            if (event.lastEventId) {
+                this.lastEventId = event.lastEventId;
+            }
             const logData = JSON.parse(event.data);
-            if (logData.type !== 'heartbeat') {
-                this.addLog(logData);
+            // Batched events carry every record queued on the server since the last one
+            const records = Array.isArray(logData) ? logData : [logData];
+            const logs = [];
+            records.forEach(record => {
+                if (record.type === 'namespaces') {
+                    this.addNamespaces(record.namespaces);
+                } else if (record.type !== 'heartbeat') {
+                    logs.push(record);
+                }
+            });
+            if (logs.length > 0) {
+                this.addLogs(logs);
             }
         };
         
@@ -174,33 +199,68 @@ class LogViewer {
     }
     
     addLog(logData) {
-        // Assign a stable, monotonically increasing index to this log
-        const absoluteIndex = this.logCounter++;
-        logData._index = absoluteIndex;
+        this.addLogs([logData]);
+    }
+    
+    addNamespaces(namespaces) {
+        // Namespaces the server's filter keeps from us; list them so they can be selected
+        const newNamespaces = namespaces.filter(namespace => !this.namespaces.has(namespace));
+        if (newNamespaces.length === 0) {
+            return;
+        }
+        newNamespaces.forEach(namespace => this.namespaces.add(namespace));
+        this.updateNamespaceFilter(newNamespaces);
 
-        this.logs.push(logData);
+        // New namespaces start out selected, so widen a namespace-filtered
+        // subscription; its logs are newer than anything we have received
+        if (this.filterQuery() !== this.subscriptionQuery) {
+            this.connectEventSource();
+        }
+    }
+    
+    addLogs(batch) {
+        const fragment = document.createDocumentFragment();
+        const newNamespaces = [];
 
-        // Sliding window: prevent unbounded memory growth
-        if (this.logs.length > this.MAX_LOGS) {
-            this.logs.shift(); // Remove oldest log
-            // Remove the first DOM element as well
-            if (this.logsContainer.firstChild) {
-                this.logsContainer.removeChild(this.logsContainer.firstChild);
+        batch.forEach(logData => {
+            // Assign a stable, monotonically increasing index to this log
+            const absoluteIndex = this.logCounter++;
+            logData._index = absoluteIndex;
+
+            this.logs.push(logData);
+
+            // Collect namespaces that are new to the filter dropdown
+            if (!this.namespaces.has(logData.namespace)) {
+                this.namespaces.add(logData.namespace);
+                newNamespaces.push(logData.namespace);
             }
+        });
+
+        // Add new namespaces before filtering, since they start out selected
+        if (newNamespaces.length > 0) {
+            this.updateNamespaceFilter(newNamespaces);
         }
 
-        // Add namespace to the filter dropdown if it's new
-        const isNewNamespace = !this.namespaces.has(logData.namespace);
-        if (isNewNamespace) {
-            this.namespaces.add(logData.namespace);
-            this.updateNamespaceFilter(logData.namespace);
+        batch.forEach(logData => {
+            // Check if the new log passes the active filters
+            if (this.passesActiveFilters(logData)) {
+                fragment.appendChild(this.createLogElement(logData, logData._index));
+            }
+        });
+
+        // Sliding window: prevent unbounded memory growth
+        const excess = this.logs.length - this.MAX_LOGS;
+        if (excess > 0) {
+            this.logs.splice(0, excess); // Remove oldest logs
+            // Remove as many of the first DOM elements as well
+            for (let i = 0; i < excess && this.logsContainer.firstChild; i++) {
+                this.logsContainer.removeChild(this.logsContainer.firstChild);
+            }
         }
 
-        // Check if the new log passes the active filters
-        if (this.passesActiveFilters(logData)) {
-            // Add DOM element for the new log directly using its absolute index
-            const logElement = this.createLogElement(logData, absoluteIndex);
-            this.logsContainer.appendChild(logElement);
+        if (fragment.childNodes.length > 0) {
+            // One DOM insertion for the whole batch
+            this.logsContainer.appendChild(fragment);
 
             // Hide the no-logs element if it's visible
             if (this.noLogsElement.style.display !== 'none') {
@@ -214,7 +274,7 @@ class LogViewer {
         }
     }
     
-    updateNamespaceFilter(newNamespace = null) {
+    updateNamespaceFilter(newNamespaces = []) {
         const currentCheckboxes = this.namespaceOptions.querySelectorAll('input[type="checkbox"]');
         const currentSelection = Array.from(currentCheckboxes)
             .filter(cb => cb.checked)
@@ -231,7 +291,7 @@ class LogViewer {
             checkbox.value = namespace;
             
             // Auto-select new namespaces, or maintain current selection for existing ones
-            if (newNamespace && namespace === newNamespace) {
+            if (newNamespaces.includes(namespace)) {
                 checkbox.checked = true; // Always select new namespaces
             } else {
                 checkbox.checked = currentSelection.length === 0 || currentSelection.includes(namespace);
@@ -249,6 +309,48 @@ class LogViewer {
     
     applyFilters() {
         this.renderLogs();
+        this.scheduleResubscribe();
+    }
+    
+    checkedValues(optionsContainer) {
+        // Values to send to the server, or null when everything is selected
+        const all = optionsContainer.querySelectorAll('input[type="checkbox"]');
+        const checked = Array.from(optionsContainer.querySelectorAll('input[type="checkbox"]:checked'))
+            .map(cb => cb.value);
+        return checked.length === 0 || checked.length === all.length ? null : checked;
+    }
+    
+    filterQuery() {
+        let query = '';
+        const types = this.checkedValues(this.typeOptions);
+        if (types) {
+            query += `&types=${encodeURIComponent(types.join(','))}`;
+        }
+        const namespaces = this.checkedValues(this.namespaceOptions);
+        if (namespaces) {
+            query += `&namespaces=${encodeURIComponent(namespaces.join(','))}`;
+        }
+        return query;
+    }
+    
+    scheduleResubscribe() {
+        // Debounce so that ticking several checkboxes opens one new stream
+        if (this.resubscribeTimeout) {
+            clearTimeout(this.resubscribeTimeout);
+        }
+        this.resubscribeTimeout = setTimeout(() => {
+            this.resubscribeTimeout = null;
+            if (this.filterQuery() === this.subscriptionQuery) {
+                return;
+            }
+            // The server only sent logs matching the old filters, so start
+            // over from the retained history that matches the new ones
+            this.logs = [];
+            this.lastEventId = this.clearedThroughId;
+            this.reconnectAttempts = 0;
+            this.connectEventSource();
+            this.renderLogs();
+        }, 300);
     }
     
     passesActiveFilters(logData) {
@@ -334,6 +436,13 @@ class LogViewer {
         detailsHTML += `<div class="full-message-content">${this.escapeHtml(log.message)}</div>`;
         detailsHTML += '</div>';
         
+        // Which process logged it, when several share this server
+        if (log.pid !== undefined) {
+            detailsHTML += '<div class="full-message"><h4>Process:</h4>';
+            detailsHTML += `<div class="full-message-content">${this.escapeHtml(String(log.process))} (pid ${log.pid})</div>`;
+            detailsHTML += '</div>';
+        }
+        
         // Render exception first (above regular callstack)
         if (log.exception) {
             detailsHTML += '<div class="exception"><h4>Exception Traceback:</h4>';
@@ -0,0 +1,110 @@
+"""
+Tests for the asyncio server mode, run on a background event loop.
+"""
+
+import asyncio
+import threading
+import requests
+from logan.aio_server import AsyncLoganServer
+from logan.hub import LogHub
+
+
+def _start_server(**kwargs):
+    loop = asyncio.new_event_loop()
+    server = AsyncLoganServer(LogHub(), port=0, **kwargs)
+    loop.run_until_complete(server.start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server, f"http://localhost:{server.port}"
+
+
+def _open_stream(url):
+    # Uncompressed, so events can be read line by line off the raw socket
+    return requests.get(url, stream=True, timeout=5, headers={"Accept-Encoding": "identity"})
+
+
+def _read_events(response, count):
+    events = []
+    while True:
+        line = response.raw.readline()
+        if not line:
+            break
+        line = line.rstrip(b"\n")
+        if line.startswith(b"data: ") and b"heartbeat" not in line:
+            events.append(line[len(b"data: "):].decode())
+            if len(events) == count:
+                break
+    return events
+
+
+def test_routes_match_the_flask_app():
+    server, url = _start_server()
+
+    with requests.Session() as session:
+        assert session.get(f"{url}/").text.lstrip().startswith("<!DOCTYPE html>")
+        assert "LogViewer" in session.get(f"{url}/web_ui/app.js").text
+        assert session.get(f"{url}/web_ui/../server.py").status_code == 404
+        script = session.get(f"{url}/web_ui/app.js")
+        assert script.headers["Content-Encoding"] == "gzip"
+        assert session.get(f"{url}/web_ui/app.js", headers={"If-None-Match": script.headers["ETag"]}).status_code == 304
+
+        assert session.post(f"{url}/api/log", json={"message": "single"}).json() == {"status": "ok"}
+        assert session.post(f"{url}/api/log", json=["not", "a", "record"]).status_code == 400
+        response = session.post(f"{url}/api/logs/batch", json=[{"message": "a"}, {"message": "b"}, 3])
+        assert response.json() == {"status": "ok", "accepted": 2, "rejected": 1}
+        assert session.get(f"{url}/api/stats").json()["history"]["records"] == 3
+
+
+def test_many_viewers_do_not_block_ingest():
+    server, url = _start_server()
+    server.hub.publish([{"message": "history"}])
+
+    # Far more open streams than the waitress thread pool could hold
+    viewers = [_open_stream(f"{url}/api/logs/stream") for _ in range(30)]
+    try:
+        for viewer in viewers:
+            assert _read_events(viewer, 1) == ['{"message": "history"}']
+
+        response = requests.post(f"{url}/api/logs/batch", json=[{"message": "live"}], timeout=2)
+        assert response.json()["accepted"] == 1
+
+        for viewer in viewers:
+            assert _read_events(viewer, 1) == ['{"message": "live"}']
+        assert server.hub.stats()["clients"] == 30
+    finally:
+        for viewer in viewers:
+            viewer.close()
+
+
+def test_batch_stream_coalesces_a_burst():
+    server, url = _start_server()
+
+    viewer = _open_stream(f"{url}/api/logs/stream?batch=1")
+    try:
+        requests.post(f"{url}/api/logs/batch", json=[{"message": f"log {i}"} for i in range(50)], timeout=2)
+        events = _read_events(viewer, 1)
+    finally:
+        viewer.close()
+
+    assert events == ["[" + ",".join(f'{{"message": "log {i}"}}' for i in range(50)) + "]"]
+
+
+def test_stream_is_gzipped_with_a_flush_per_event():
+    import http.client
+    import zlib
+
+    server, url = _start_server()
+    server.hub.publish([{"message": "history", "callstack": [{"file": "/srv/app/handlers.py"}] * 20}])
+
+    connection = http.client.HTTPConnection("localhost", server.port, timeout=5)
+    try:
+        connection.request("GET", "/api/logs/stream", headers={"Accept-Encoding": "gzip"})
+        response = connection.getresponse()
+        assert response.getheader("Content-Encoding") == "gzip"
+        # The first flushed chunk decodes to the complete replayed event on its own
+        chunk = response.read1(65536)
+    finally:
+        connection.close()
+
+    text = zlib.decompressobj(31).decompress(chunk).decode()
+    assert text.startswith(f"id: {server.hub.epoch}-1\ndata: ") and text.endswith("\n\n")
+    assert len(chunk) < len(text) / 3
@@ -0,0 +1,46 @@
+"""
+Tests for lazy callstack capture.
+"""
+
+import sys
+from logan import callstack
+
+
+def _capture_from_helper():
+    return callstack.capture("<no file>"), sys._getframe().f_lineno
+
+
+def test_capture_and_materialize_match_the_real_stack():
+    frames, line = _capture_from_helper()
+    stack = callstack.materialize(frames)
+
+    assert stack[0] == {"file": __file__, "line": line, "function": "_capture_from_helper"}
+    assert stack[1]["function"] == "test_capture_and_materialize_match_the_real_stack"
+    assert callstack.caller(frames) == (__file__, line, "_capture_from_helper")
+
+
+def test_capture_skips_the_given_file():
+    frames = callstack.capture(__file__)
+    assert all(code.co_filename != __file__ for code, _ in frames)
+
+
+def test_capture_respects_limit():
+    assert callstack.capture("<no file>", limit=0) == []
+    assert len(callstack.capture("<no file>", limit=1)) == 1
+    assert len(callstack.capture("<no file>", limit=3)) == 3
+
+
+def test_policy_prefers_the_most_specific_rule():
+    from logan.policy import CallstackPolicy
+
+    policy = CallstackPolicy(rules={"error": "full", "debug": "caller", ("debug", "db"): 5})
+    policy.set("none", namespace="hot_loop")
+
+    assert policy.limit("error", "api") is None
+    assert policy.limit("debug", "api") == 1
+    assert policy.limit("debug", "db") == 5
+    assert policy.limit("debug", "hot_loop") == 0
+    assert policy.limit("info", "api") is None
+
+    policy.set("caller")
+    assert policy.limit("info", "api") == 1
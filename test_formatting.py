@@ -0,0 +1,95 @@
+"""
+Tests for deferred message formatting.
+"""
+
+import pytest
+
+from logan import Logan
+
+
+def test_format_styles():
+    assert Logan._format_message("plain 100%") == "plain 100%"
+    assert Logan._format_message("item %d/%d", (3, 10)) == "item 3/10"
+    assert Logan._format_message("item {}/{}", (3, 10)) == "item 3/10"
+    assert Logan._format_message("user {name}", (), {"name": "ada"}) == "user ada"
+    assert Logan._format_message("%(count)s rows", ({"count": 5},)) == "5 rows"
+    assert "formatting failed" in Logan._format_message("missing %d %d", (1,))
+    # A literal percent sign does not make a template %-style
+    assert Logan._format_message("progress {}%", (5,)) == "progress 5%"
+    assert Logan._format_message("{}% of {}", (50, "rows")) == "50% of rows"
+    assert Logan._format_message("100%% of %s", ("rows",)) == "100% of rows"
+
+
+def test_unused_args_are_kept_and_warned_about():
+    error = ValueError("boom")
+    # The pre-deferral positional call Logan.error(message, namespace, exception)
+    with pytest.warns(UserWarning, match="no placeholder"):
+        message = Logan._format_message("failed", ("db", error))
+    assert message == "failed [unused args: ('db', ValueError('boom'))]"
+
+    with pytest.warns(UserWarning):
+        assert Logan._format_message("failed {}", ("db", error)).startswith("failed db [unused args: (ValueError")
+    with pytest.warns(UserWarning):
+        assert "unused args" in Logan._format_message("plain", (), {"extra": 1})
+
+
+def test_unused_args_warning_names_the_logging_call(monkeypatch):
+    import inspect
+    from logan.policy import CallstackPolicy
+
+    queued = []
+
+    class FakeSender:
+        def submit(self, entry):
+            queued.append(entry)
+
+    class FakeTransport:
+        def send_batch(self, batch):
+            pass
+
+    monkeypatch.setattr(Logan, "_server", object())
+    monkeypatch.setattr(Logan, "_sender", FakeSender())
+    monkeypatch.setattr(Logan, "_transport", FakeTransport())
+    monkeypatch.setattr(Logan, "_callstack_policy", CallstackPolicy(rules={"error": "none"}))
+
+    first_line = inspect.currentframe().f_lineno + 1
+    Logan.error("failed", "db", ValueError("boom"))
+    Logan.error("also failed", "api")
+
+    # Formatting happens later, as if on the sender thread
+    with pytest.warns(UserWarning) as caught:
+        Logan._send_batch(queued)
+    assert [(w.filename, w.lineno) for w in caught] == [(__file__, first_line), (__file__, first_line + 1)]
+
+
+def test_send_batch_formats_on_the_sender_thread(monkeypatch):
+    sent = []
+
+    class FakeTransport:
+        def send_batch(self, batch):
+            sent.extend(batch)
+
+    monkeypatch.setattr(Logan, "_transport", FakeTransport())
+    entry = {"message": "item {}/{}", "args": ((1, 2), {}, []), "callstack": []}
+    Logan._send_batch([entry])
+
+    assert sent[0]["message"] == "item 1/2"
+    assert "args" not in sent[0]
+
+
+def test_logging_handler_receives_args(monkeypatch):
+    import logging
+
+    records = []
+
+    class ListHandler(logging.Handler):
+        def emit(self, record):
+            records.append(record)
+
+    monkeypatch.setattr(Logan, "_logging_handler", ListHandler())
+    Logan._send_to_logging_handler("loaded %d rows", "info", "io", [], None, (42,), {})
+    Logan._send_to_logging_handler("loaded {} rows", "info", "io", [], None, (7,), {})
+
+    assert records[0].msg == "loaded %d rows" and records[0].args == (42,)
+    assert records[0].getMessage() == "loaded 42 rows"
+    assert records[1].getMessage() == "loaded 7 rows" and records[1].args == ()
@@ -0,0 +1,21 @@
+"""
+Tests that importing and logging without a server stays clear of the web and HTTP stacks.
+"""
+
+import subprocess
+import sys
+
+
+def test_import_does_not_load_server_or_http_stack():
+    script = (
+        "import sys\n"
+        "from logan import Logan\n"
+        "Logan.init(no_server=True)\n"
+        "Logan.info('console only %d', 1)\n"
+        "heavy = ('flask', 'waitress', 'requests', 'urllib3', 'logan.server', 'logan.transport')\n"
+        "print('loaded:', [name for name in heavy if name in sys.modules])\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+
+    assert "console only 1" in result.stdout
+    assert result.stdout.strip().splitlines()[-1] == "loaded: []"
@@ -0,0 +1,26 @@
+"""
+Tests for client-side level and namespace threshold filtering.
+"""
+
+from logan import Logan
+
+
+def test_suppressed_logs_skip_all_work(monkeypatch):
+    calls = []
+    monkeypatch.setattr(Logan, "_log", classmethod(lambda cls, message, **kwargs: calls.append(message)))
+    monkeypatch.setattr(Logan, "_suppressed", {})
+    monkeypatch.setattr(Logan, "_min_levels", {})
+
+    Logan.set_level("info")
+    Logan.set_level("error", namespace="db")
+    try:
+        Logan.debug("hidden", namespace="api")
+        Logan.info("shown", namespace="api")
+        Logan.warn("hidden", namespace="db")
+        Logan.error("shown too", namespace="db")
+        Logan.debug("hidden", namespace="db")
+    finally:
+        Logan.set_level("debug")
+
+    assert calls == ["shown", "shown too"]
+    assert Logan.stats()["suppressed"] == {"api": {"debug": 1}, "db": {"warning": 1, "debug": 1}}
@@ -0,0 +1,83 @@
+"""
+Tests for the background batching sender used by Logan._log.
+"""
+
+import threading
+import time
+from logan.sender import LogSender
+
+
+def test_sender_batches_records():
+    """Records submitted in a burst are shipped together in a few batches."""
+    batches = []
+    sender = LogSender(batches.append, batch_size=50, linger=0.05)
+    sender.start()
+
+    for i in range(120):
+        assert sender.submit({"message": f"record {i}"})
+
+    assert sender.flush(timeout=5), "Sender did not drain in time"
+
+    shipped = [record["message"] for batch in batches for record in batch]
+    assert shipped == [f"record {i}" for i in range(120)]
+    assert all(len(batch) <= 50 for batch in batches)
+    assert len(batches) <= 5, f"Expected few batches, got {len(batches)}"
+
+
+def test_sender_drops_when_queue_is_full():
+    """A full queue drops records instead of blocking the caller."""
+    release = threading.Event()
+    sender = LogSender(lambda batch: release.wait(), max_queue_size=5, batch_size=1, linger=0)
+    sender.start()
+
+    results = [sender.submit({"message": i}) for i in range(20)]
+    release.set()
+
+    assert results.count(False) == sender.dropped
+    assert sender.dropped > 0
+    assert sender.flush(timeout=5)
+
+
+def test_submit_is_cheap():
+    """Submitting a record must not wait on the network."""
+    sender = LogSender(lambda batch: time.sleep(0.01), max_queue_size=100000)
+    sender.start()
+
+    start = time.perf_counter()
+    for i in range(10000):
+        sender.submit({"message": i})
+    per_call = (time.perf_counter() - start) / 10000
+
+    assert per_call < 50e-6, f"submit took {per_call * 1e6:.1f}us per call"
+
+
+def test_failed_batches_are_counted():
+    def send_batch(batch):
+        raise TypeError("Object of type bytes is not JSON serializable")
+
+    sender = LogSender(send_batch, batch_size=10, linger=0)
+    sender.start()
+    for i in range(3):
+        sender.submit({"message": i})
+
+    assert sender.flush(timeout=5)
+    stats = sender.stats()
+    assert stats["failed"] == 3 and stats["batches"] == 0
+    assert "not JSON serializable" in stats["last_error"]
+
+
+def test_one_unencodable_message_does_not_lose_the_batch(monkeypatch):
+    from logan import Logan
+    from logan.hub import LogHub
+    from logan.process import InProcessTransport
+
+    hub = LogHub()
+    monkeypatch.setattr(Logan, "_transport", InProcessTransport(hub))
+    batch = [{"message": f"good {i}", "callstack": []} for i in range(10)]
+    batch.append({"message": b"raw", "callstack": []})
+    batch += [{"message": f"more {i}", "callstack": []} for i in range(10)]
+
+    Logan._send_batch(batch)
+
+    assert len(hub.history) == 21
+    assert hub.history.snapshot()[10][1].count("b'raw'") == 1
@@ -0,0 +1,349 @@
+"""
+Tests for the LoganServer HTTP routes, driven through Flask's test client.
+"""
+
+import json
+from logan.server import LoganServer
+from logan.hub import ThreadSubscriber
+
+
+def _frame_record(frame):
+    """Decode the JSON record carried by an SSE frame."""
+    return json.loads(frame.decode().split("data: ", 1)[1])
+
+
+def _server_with_client():
+    server = LoganServer(port=0)
+    subscriber = ThreadSubscriber()
+    server.hub.subscribe(subscriber)
+    return server, server.app.test_client(), subscriber
+
+
+def test_batch_accepts_json_array():
+    server, http, subscriber = _server_with_client()
+
+    records = [{"message": f"log {i}", "type": "info", "namespace": "test"} for i in range(3)]
+    response = http.post("/api/logs/batch", json=records + ["not a record"])
+
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "ok", "accepted": 3, "rejected": 1}
+    assert [_frame_record(frame)["message"] for frame in subscriber.pop_all()] == ["log 0", "log 1", "log 2"]
+
+
+def test_single_record_must_be_an_object():
+    server, http, subscriber = _server_with_client()
+
+    for body in ('["a", "list"]', '"text"', '42', 'null'):
+        assert http.post("/api/log", data=body, content_type="application/json").status_code == 400
+    assert http.post("/api/log", json={"message": "ok"}).status_code == 200
+    assert [_frame_record(frame)["message"] for frame in subscriber.pop_all()] == ["ok"]
+
+
+def test_batch_accepts_ndjson():
+    server, http, subscriber = _server_with_client()
+
+    body = "\n".join([
+        json.dumps({"message": "first"}),
+        "{broken",
+        "",
+        json.dumps({"message": "second"}),
+    ])
+    response = http.post("/api/logs/batch", data=body, content_type="application/x-ndjson")
+
+    assert response.get_json() == {"status": "ok", "accepted": 2, "rejected": 1}
+    assert [_frame_record(frame)["message"] for frame in subscriber.pop_all()] == ["first", "second"]
+
+
+def test_history_is_bounded():
+    from logan.history import LogHistory
+
+    history = LogHistory(max_records=3, max_bytes=1000)
+    for i in range(5):
+        history.append(i + 1, json.dumps({"message": i}))
+    assert [json.loads(p)["message"] for _, p in history.snapshot()] == [2, 3, 4]
+
+    history = LogHistory(max_records=100, max_bytes=40)
+    for i in range(5):
+        history.append(i + 1, "x" * 15)
+    assert len(history) == 2
+    assert history.stats()["evicted"] == 3
+
+
+def test_new_viewer_gets_history_replayed():
+    server = LoganServer(port=0)
+    http = server.app.test_client()
+    http.post("/api/logs/batch", json=[{"message": "before"}, {"message": "connect"}])
+
+    response = http.get("/api/logs/stream", buffered=False)
+    stream = iter(response.response)
+    burst = next(stream).decode()
+    response.close()
+
+    assert burst.count("data: ") == 2
+    assert '"before"' in burst and '"connect"' in burst
+    assert http.get("/api/stats").get_json()["history"]["records"] == 2
+
+
+def test_reconnect_resumes_after_last_event_id():
+    server = LoganServer(port=0)
+    http = server.app.test_client()
+    http.post("/api/logs/batch", json=[{"message": f"log {i}"} for i in range(5)])
+
+    epoch = server.hub.epoch
+
+    response = http.get("/api/logs/stream", headers={"Last-Event-ID": f"{epoch}-3"}, buffered=False)
+    burst = next(iter(response.response)).decode()
+    response.close()
+    assert burst == "".join(f'id: {epoch}-{i + 1}\ndata: {{"message": "log {i}"}}\n\n' for i in (3, 4))
+
+    # An ID from an earlier run of the server replays everything retained,
+    # whether or not its number is in range for this run
+    for stale in ("0123abcd-99", "0123abcd-2", "2"):
+        response = http.get(f"/api/logs/stream?last_event_id={stale}", buffered=False)
+        burst = next(iter(response.response)).decode()
+        response.close()
+        assert burst.count("data: ") == 5
+
+
+def _slow_viewer(policy):
+    server = LoganServer(port=0, max_pending=3, slow_consumer_policy=policy)
+    subscriber = ThreadSubscriber(**server.hub.subscriber_options)
+    server.hub.subscribe(subscriber)
+    server.hub.publish([{"message": f"log {i}"} for i in range(5)])
+    return server, subscriber
+
+
+def test_slow_viewer_drops_oldest():
+    server, subscriber = _slow_viewer("drop_oldest")
+
+    assert [_frame_record(frame)["message"] for frame in subscriber.pop_all()] == ["log 2", "log 3", "log 4"]
+    viewer = server.stats()["viewers"][0]
+    assert viewer["dropped"] == 2
+    assert viewer["high_water"] == 3
+    assert viewer["lag"] == 0
+
+
+def test_slow_viewer_gets_skipped_marker():
+    server, subscriber = _slow_viewer("coalesce")
+    assert server.stats()["viewers"][0]["lag"] == 5
+
+    records = [_frame_record(frame) for frame in subscriber.pop_all()]
+    assert records[0]["skipped"] == 2
+    assert records[0]["type"] == "warning"
+    assert [record["message"] for record in records[1:]] == ["log 2", "log 3", "log 4"]
+
+
+def test_slow_viewer_is_disconnected():
+    server, subscriber = _slow_viewer("disconnect")
+
+    assert subscriber.closed
+    assert subscriber.wait(timeout=0) == []
+    assert server.stats()["viewers"][0]["dropped"] == 4
+
+
+def test_batch_stream_sends_arrays():
+    server = LoganServer(port=0, max_pending=3)
+    subscriber = ThreadSubscriber(batch=True, max_batch_records=2, **server.hub.subscriber_options)
+    server.hub.subscribe(subscriber)
+    server.hub.publish([{"message": f"log {i}"} for i in range(5)])
+
+    frames = subscriber.pop_all()
+    assert len(frames) == 1
+    assert frames[0].startswith(f"id: {server.hub.epoch}-4\n".encode())
+    records = _frame_record(frames[0])
+    assert records[0]["skipped"] == 2
+    assert [record["message"] for record in records[1:]] == ["log 2", "log 3"]
+    assert [_frame_record(frame) for frame in subscriber.wait(timeout=0)] == [[{"message": "log 4"}]]
+
+
+def test_batch_stream_replays_history_in_arrays():
+    server = LoganServer(port=0)
+    http = server.app.test_client()
+    http.post("/api/logs/batch", json=[{"message": f"log {i}"} for i in range(3)])
+
+    epoch = server.hub.epoch
+
+    response = http.get(f"/api/logs/stream?batch=1&last_event_id={epoch}-1", buffered=False)
+    burst = next(iter(response.response)).decode()
+    response.close()
+    assert burst == f'id: {epoch}-3\ndata: [{{"message": "log 1"}},{{"message": "log 2"}}]\n\n'
+
+
+def test_filtered_stream_only_gets_matching_records():
+    server = LoganServer(port=0)
+    http = server.app.test_client()
+    http.post("/api/logs/batch", json=[
+        {"message": "old db error", "type": "error", "namespace": "db"},
+        {"message": "old db debug", "type": "debug", "namespace": "db"},
+        {"message": "old api error", "type": "error", "namespace": "api"},
+    ])
+
+    response = http.get("/api/logs/stream?namespaces=db,cache&min_level=warning", buffered=False)
+    stream = iter(response.response)
+    burst = next(stream).decode()
+    assert burst.startswith('data: {"type": "namespaces", "namespaces": ["api", "db"]}\n\n')
+    assert burst.count("id: ") == 1 and "old db error" in burst
+
+    http.post("/api/logs/batch", json=[
+        {"message": "Cache miss", "type": "warning", "namespace": "cache"},
+        {"message": "cache hit", "type": "info", "namespace": "cache"},
+        {"message": "new namespace", "type": "error", "namespace": "auth"},
+    ])
+    assert server.stats()["viewers"][0]["filter"]["namespaces"] == ["cache", "db"]
+    live = [json.loads(line[len("data: "):]) for line in next(stream).decode().splitlines() if line.startswith("data: ")]
+    response.close()
+    assert live == [
+        {"type": "namespaces", "namespaces": ["cache"]},
+        {"message": "Cache miss", "type": "warning", "namespace": "cache"},
+        {"type": "namespaces", "namespaces": ["auth"]},
+    ]
+
+
+def test_stream_filter_matches_text_and_types():
+    from logan.filters import StreamFilter
+
+    assert StreamFilter.from_args({}) is None
+    stream_filter = StreamFilter.from_args({"types": "warn,error", "q": "TIMEOUT"})
+    assert stream_filter.matches({"type": "warning", "message": "db timeout"})
+    assert not stream_filter.matches({"type": "warning", "message": "db slow"})
+    assert not stream_filter.matches({"type": "info", "message": "timeout"})
+
+
+def test_stream_rejects_unknown_min_level():
+    http = LoganServer(port=0).app.test_client()
+    assert http.get("/api/logs/stream?min_level=loud").status_code == 400
+
+
+def test_subscription_index_agrees_with_filters():
+    import itertools
+    from logan.filters import StreamFilter, SubscriptionIndex
+    from logan.hub import Subscriber
+
+    index = SubscriptionIndex()
+    filters = [None, StreamFilter(namespaces=["db"]), StreamFilter(types=["error"], namespaces=["db", "api"]),
+               StreamFilter(min_level="warning"), StreamFilter(text="slow"), StreamFilter(types=["debug"], min_level="error")]
+    subscribers = [Subscriber(filter=stream_filter) for stream_filter in filters]
+    for subscriber in subscribers:
+        index.add(subscriber)
+    index.remove(subscribers[1])
+
+    for namespace, type, message in itertools.product(["db", "api", "web", None, ["x"]],
+                                                      ["debug", "info", "warning", "error", "custom"],
+                                                      ["query was slow", "ok"]):
+        record = {"namespace": namespace, "type": type, "message": message}
+        expected = {subscriber for subscriber in subscribers[:1] + subscribers[2:]
+                    if subscriber.filter is None or subscriber.filter.matches(record)}
+        assert set(index.match(record)) == expected
+
+
+def test_stream_is_gzipped_when_accepted():
+    import zlib
+    from logan.hub import accepts_gzip
+
+    assert accepts_gzip("gzip, deflate, br") and not accepts_gzip("gzip;q=0, identity") and not accepts_gzip(None)
+
+    server = LoganServer(port=0)
+    http = server.app.test_client()
+    http.post("/api/logs/batch", json=[{"message": "compressed"}])
+
+    response = http.get("/api/logs/stream", headers={"Accept-Encoding": "gzip"}, buffered=False)
+    chunk = next(iter(response.response))
+    response.close()
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert zlib.decompressobj(31).decompress(chunk) == f'id: {server.hub.epoch}-1\ndata: {{"message": "compressed"}}\n\n'.encode()
+
+
+def test_static_assets_are_fingerprinted_and_revalidated():
+    import gzip
+    import re
+
+    http = LoganServer(port=0).app.test_client()
+
+    index = http.get("/")
+    assert index.headers["Cache-Control"] == "no-cache"
+    assert http.get("/", headers={"If-None-Match": index.headers["ETag"]}).status_code == 304
+
+    script_url = re.search(r'src="(/web_ui/app\.js\?v=\w+)"', index.get_data(as_text=True)).group(1)
+    script = http.get(script_url, headers={"Accept-Encoding": "gzip"})
+    assert script.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert script.headers["Content-Encoding"] == "gzip"
+    assert b"class LogViewer" in gzip.decompress(script.get_data())
+
+    assert http.get(script_url, headers={"If-None-Match": script.headers["ETag"], "Accept-Encoding": "gzip"}).status_code == 304
+    assert http.get("/web_ui/app.js").headers["Cache-Control"] == "no-cache"
+    assert http.get("/web_ui/missing.js").status_code == 404
+
+
+def test_wait_ready_reports_startup():
+    server = LoganServer(port=0)
+    server.run()
+    try:
+        assert server.wait_ready(timeout=30)
+    finally:
+        server.stop()
+
+    # A child that dies before binding is reported instead of waited on
+    broken = LoganServer(port=0, shm_name="logan-test-missing-segment")
+    broken.run()
+    assert not broken.wait_ready(timeout=30)
+
+
+def test_server_child_serves_on_the_parents_socket():
+    import requests
+    from logan import Logan
+
+    taken = Logan._bind_listening_socket(start_port=0, max_attempts=1)
+    start_port = taken.getsockname()[1]
+    listen_socket = Logan._bind_listening_socket(start_port=start_port, max_attempts=2)
+    port = listen_socket.getsockname()[1]
+    taken.close()
+    assert port != start_port
+
+    server = LoganServer(port=port, listen_socket=listen_socket)
+    server.run()
+    listen_socket.close()
+    try:
+        assert server.wait_ready(timeout=30)
+        assert requests.post(f"http://localhost:{port}/api/logs/batch", json=[{"message": "hi"}], timeout=5).json()["accepted"] == 1
+    finally:
+        server.stop()
+
+
+def test_in_process_server_takes_records_without_http():
+    import requests
+    from logan import Logan
+    from logan.process import InProcessTransport, ServerThread
+
+    listen_socket = Logan._bind_listening_socket(start_port=0, max_attempts=1)
+    port = listen_socket.getsockname()[1]
+    server = ServerThread(port=port, listen_socket=listen_socket)
+    server.run()
+    assert server.wait_ready(timeout=10)
+
+    subscriber = ThreadSubscriber()
+    server.server.hub.subscribe(subscriber)
+    transport = InProcessTransport(server.server.hub)
+    transport.send_batch([{"message": "direct", "namespace": "nb"}])
+
+    assert [_frame_record(frame)["message"] for frame in subscriber.pop_all()] == ["direct"]
+    assert requests.get(f"http://localhost:{port}/api/stats", timeout=5).json()["last_event_id"] == 1
+
+
+def test_init_with_in_process_transport(monkeypatch):
+    import requests
+    from logan import Logan
+
+    for name in ("_server", "_sender", "_transport", "_transport_factory", "_port", "_server_url"):
+        monkeypatch.setattr(Logan, name, None)
+    Logan.init(transport="inprocess", startup_timeout=10)
+    assert Logan.stats()["transport"]["in_process"]
+
+    subscriber = ThreadSubscriber()
+    Logan._server.server.hub.subscribe(subscriber)
+    Logan.info("cell {} done", 3, namespace="notebook")
+    assert Logan.flush(timeout=5)
+
+    record = _frame_record(b"".join(subscriber.wait(timeout=2)))
+    assert record["message"] == "cell 3 done" and record["namespace"] == "notebook"
+    # The same server still answers the viewer over HTTP
+    assert requests.get(f"{Logan._server_url}/api/stats", timeout=5).json()["last_event_id"] == 1
@@ -0,0 +1,284 @@
+"""
+Tests for sharing one Logan server between several processes.
+"""
+
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+import pytest
+import requests
+
+from logan import Logan
+from logan.discovery import AttachedServer, ServerRegistry, _port_open
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="shared servers need POSIX")
+
+
+def _registry(tmp_path):
+    return ServerRegistry(str(tmp_path / "logan-test.json"))
+
+
+@pytest.fixture
+def group():
+    name = f"test-{uuid.uuid4().hex}"
+    yield name
+    registry = ServerRegistry.for_name(name)
+    info = registry.load()
+    if info is not None:
+        try:
+            os.kill(info["pid"], signal.SIGTERM)
+        except OSError:
+            pass
+    for path in (registry.path, registry.path + ".lock"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def _find_records(port, messages):
+    """Read the stream until a record has been seen for every message; returns them by message."""
+    found = {}
+    response = requests.get(f"http://localhost:{port}/api/logs/stream", stream=True, timeout=5,
+                            headers={"Accept-Encoding": "identity"})
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("data: "):
+                record = json.loads(line[len("data: "):])
+                if record.get("message") in messages:
+                    found[record["message"]] = record
+                    if len(found) == len(messages):
+                        break
+    finally:
+        response.close()
+    return found
+
+
+def test_registry_round_trip_for_live_server(tmp_path):
+    registry = _registry(tmp_path)
+    assert registry.read() is None
+
+    with socket.socket() as listener:
+        listener.bind(("localhost", 0))
+        listener.listen(1)
+        port = listener.getsockname()[1]
+
+        with registry.lock():
+            registry.write({"pid": os.getpid(), "port": port})
+        info = registry.read()
+        assert info["port"] == port
+        assert AttachedServer(info).wait_ready()
+
+
+def test_registry_tracks_live_producers(tmp_path):
+    registry = _registry(tmp_path)
+    exited = multiprocessing.get_context("fork").Process(target=int)
+    exited.start()
+    exited.join()
+
+    registry.join({"pid": 1234, "port": 1, "producers": [exited.pid]}, os.getpid())
+    assert registry.load()["producers"] == [os.getpid()]
+    assert registry.live_producers(1234) == [os.getpid()]
+    # Producers of some other server do not keep this one alive
+    assert registry.live_producers(5678) == []
+
+    registry.remove(5678)
+    assert registry.load() is not None
+    registry.remove(1234)
+    assert registry.load() is None
+
+
+def test_registry_ignores_stale_entries(tmp_path):
+    registry = _registry(tmp_path)
+
+    with socket.socket() as listener:
+        listener.bind(("localhost", 0))
+        port = listener.getsockname()[1]
+    # Nothing listens on the port any more
+    registry.write({"pid": os.getpid(), "port": port})
+    assert registry.read() is None
+
+    (tmp_path / "logan-test.json").write_text("{not json")
+    assert registry.read() is None
+
+
+@pytest.mark.skipif(os.getuid() != 0, reason="needs to create a file owned by another user")
+def test_registry_ignores_entries_written_by_another_user(tmp_path):
+    registry = _registry(tmp_path)
+
+    with socket.socket() as listener:
+        listener.bind(("localhost", 0))
+        listener.listen(1)
+        registry.write({"pid": os.getpid(), "port": listener.getsockname()[1]})
+        assert registry.read() is not None
+
+        os.chown(registry.path, 65534, 65534)
+        assert registry.load() is None and registry.read() is None
+
+
+def test_registries_live_in_a_private_directory(tmp_path, monkeypatch):
+    import stat
+    import tempfile
+
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    registry = ServerRegistry.for_name("private")
+    directory = os.path.dirname(registry.path)
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+    # A directory others can write to could hold a planted entry
+    os.chmod(directory, 0o777)
+    with pytest.raises(PermissionError):
+        ServerRegistry.for_name("private")
+
+
+def test_shared_requires_http_transport():
+    with pytest.raises(ValueError):
+        Logan.init(shared=True, transport="shm")
+
+
+def _init_shared_and_log(group, message):
+    Logan._server = None
+    Logan.init(shared=group, shared_linger=2)
+    # Not flushed by hand; queued logs are sent as the process exits
+    Logan.info(message, namespace="shared-test")
+
+
+def test_server_outlives_the_process_that_started_it(group):
+    registry = ServerRegistry.for_name(group)
+    context = multiprocessing.get_context("fork")
+
+    owner = context.Process(target=_init_shared_and_log, args=(group, "from owner"), name="owner")
+    owner.start()
+    owner.join(timeout=10)
+    assert owner.exitcode == 0
+    info = registry.read()
+    assert info is not None and info["pid"] != owner.pid
+
+    worker = context.Process(target=_init_shared_and_log, args=(group, "from worker"), name="worker-1")
+    worker.start()
+    worker.join(timeout=10)
+    assert worker.exitcode == 0
+    # The worker attached instead of starting a server of its own
+    assert registry.read()["pid"] == info["pid"]
+
+    records = _find_records(info["port"], {"from owner", "from worker"})
+    assert records["from worker"]["pid"] == worker.pid
+    assert records["from worker"]["process"] == "worker-1"
+    assert records["from owner"]["pid"] == owner.pid
+
+    # With every producer gone the server lingers briefly, then exits and clears its entry
+    assert _wait_until(lambda: registry.load() is None)
+    assert _wait_until(lambda: not _port_open(info["port"]))
+
+
+def _start_then_fork(group, child_pids):
+    Logan._server = None
+    Logan.init(shared=group, shared_linger=1)
+    starter = os.getpid()
+    pid = os.fork()
+    if pid == 0:
+        # Log only once the starter has exited and the server's linger has run out
+        _wait_until(lambda: os.getppid() != starter)
+        time.sleep(2.5)
+        Logan.info("from forked child", namespace="shared-test")
+        Logan.flush(timeout=5)
+        os._exit(0)
+    child_pids.put(pid)
+
+
+def test_forked_child_keeps_the_server_alive_after_its_parent_exits(group):
+    registry = ServerRegistry.for_name(group)
+    context = multiprocessing.get_context("fork")
+    child_pids = context.Queue()
+
+    starter = context.Process(target=_start_then_fork, args=(group, child_pids), name="starter")
+    starter.start()
+    child_pid = child_pids.get(timeout=10)
+    starter.join(timeout=10)
+    assert starter.exitcode == 0
+
+    assert _wait_until(lambda: child_pid in (registry.load() or {}).get("producers", []))
+    info = registry.read()
+    records = _find_records(info["port"], {"from forked child"})
+    assert records["from forked child"]["pid"] == child_pid
+
+    assert _wait_until(lambda: registry.load() is None)
+    assert _wait_until(lambda: not _port_open(info["port"]))
+
+
+def _pool_task(args):
+    group, task = args
+    if Logan._server is None:
+        Logan.init(shared=group, shared_linger=2)
+    Logan.info(f"task {task}", namespace="pool")
+    return os.getpid(), Logan._port
+
+
+def test_pool_workers_share_one_server(group):
+    registry = ServerRegistry.for_name(group)
+
+    # Pool workers are daemonic, so they cannot start multiprocessing children
+    pool = multiprocessing.get_context("spawn").Pool(2)
+    results = pool.map(_pool_task, [(group, task) for task in range(4)])
+    # Workers that exit normally send what they still have queued
+    pool.close()
+    pool.join()
+    ports = {port for _, port in results}
+    assert len(ports) == 1
+
+    port = ports.pop()
+    records = _find_records(port, {f"task {task}" for task in range(4)})
+    assert [records[f"task {task}"]["pid"] for task in range(4)] == [pid for pid, _ in results]
+    info = registry.read()
+    assert info["port"] == port
+    assert info["pid"] not in {pid for pid, _ in results}
+
+
+def test_scripts_send_queued_logs_when_they_exit(group):
+    registry = ServerRegistry.for_name(group)
+    script = f"from logan import Logan; Logan.init(shared={group!r}, shared_linger=2); Logan.info('from script')"
+    package_parent = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=package_parent, timeout=30,
+                   stdout=subprocess.DEVNULL)
+
+    info = registry.read()
+    assert set(_find_records(info["port"], {"from script"})) == {"from script"}
+
+
+def test_attached_process_moves_to_a_replacement_server(group, monkeypatch):
+    for name in ("_server", "_sender", "_transport", "_transport_factory", "_port", "_server_url", "_registry"):
+        monkeypatch.setattr(Logan, name, None)
+    monkeypatch.setattr(Logan, "_next_rejoin", 0.0)
+    registry = ServerRegistry.for_name(group)
+
+    Logan.init(shared=group, shared_linger=1, failure_threshold=1)
+    crashed = registry.read()
+    os.kill(crashed["pid"], signal.SIGKILL)
+    Logan._server.process.wait()
+
+    # This batch fails, opens the breaker and makes the process start a new server
+    Logan.info("during crash")
+    assert Logan.flush(timeout=10)
+    replacement = registry.read()
+    assert replacement is not None and replacement["pid"] != crashed["pid"]
+    assert Logan._port == replacement["port"]
+
+    # The buffered batch goes out with the next one
+    Logan.info("after crash")
+    assert Logan.flush(timeout=10)
+    assert set(_find_records(replacement["port"], {"during crash", "after crash"})) == {"during crash", "after crash"}
+    assert Logan.stats()["transport"]["buffered"] == 0
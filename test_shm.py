@@ -0,0 +1,38 @@
+"""
+Tests for the shared-memory ring buffer transport.
+"""
+
+from logan.shm import ShmRingBuffer
+
+
+def test_ring_round_trip_with_wraparound():
+    producer = ShmRingBuffer.create(capacity=64)
+    consumer = ShmRingBuffer.attach(producer.name)
+    try:
+        received = []
+        for i in range(20):
+            payloads = [f"record-{i}-{j}".encode() for j in range(2)]
+            assert producer.write_many(payloads) == 2
+            received.extend(consumer.read_all())
+
+        assert received == [f"record-{i}-{j}".encode() for i in range(20) for j in range(2)]
+        assert producer.used() == 0
+    finally:
+        consumer.close()
+        producer.close()
+        producer.unlink()
+
+
+def test_ring_refuses_records_that_do_not_fit():
+    producer = ShmRingBuffer.create(capacity=32)
+    consumer = ShmRingBuffer.attach(producer.name)
+    try:
+        # Three 12-byte records (4-byte length + 8-byte payload) need 36 bytes
+        assert producer.write_many([b"aaaaaaaa", b"bbbbbbbb", b"cccccccc"]) == 2
+        assert consumer.read_all() == [b"aaaaaaaa", b"bbbbbbbb"]
+        assert producer.write_many([b"cccccccc"]) == 1
+        assert consumer.read_all() == [b"cccccccc"]
+    finally:
+        consumer.close()
+        producer.close()
+        producer.unlink()
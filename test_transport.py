@@ -0,0 +1,138 @@
+"""
+Tests for the client transport: connection pooling, the circuit breaker and the fallback buffer.
+"""
+
+import socket
+import time
+from logan.transport import CircuitBreaker, HttpTransport
+
+
+def _unused_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def test_breaker_opens_and_probes_with_backoff():
+    breaker = CircuitBreaker(failure_threshold=2, base_backoff=0.05, max_backoff=0.2)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    # A failed probe reopens with a longer delay
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.backoff == 0.1
+
+    time.sleep(0.11)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.stats()["state"] == CircuitBreaker.CLOSED
+
+
+def test_unreachable_server_is_buffered_without_stalling():
+    transport = HttpTransport(f"http://localhost:{_unused_port()}", breaker=CircuitBreaker(failure_threshold=2, base_backoff=60))
+
+    start = time.perf_counter()
+    for i in range(50):
+        transport.send_batch([{"message": f"log {i}"}])
+    elapsed = time.perf_counter() - start
+
+    stats = transport.stats()
+    assert stats["breaker"]["state"] == CircuitBreaker.OPEN
+    assert stats["buffered"] == 50
+    assert stats["sent"] == 0
+    assert elapsed < 1.0, f"Sending to a dead server took {elapsed:.2f}s"
+
+
+def test_console_fallback():
+    printed = []
+    transport = HttpTransport(f"http://localhost:{_unused_port()}", breaker=CircuitBreaker(failure_threshold=1),
+                              fallback="console", console=printed.append)
+
+    transport.send_batch([{"message": "a"}, {"message": "b"}])
+
+    assert [entry["message"] for entry in printed] == ["a", "b"]
+    assert transport.stats()["buffered"] == 0
+
+
+def test_unix_socket_transport_delivers_batches(tmp_path):
+    import threading
+    from waitress import create_server
+    from logan.hub import ThreadSubscriber
+    from logan.server import LoganServer
+    from logan.transport import UnixSocketTransport
+
+    server = LoganServer(port=0)
+    subscriber = ThreadSubscriber()
+    server.hub.subscribe(subscriber)
+
+    socket_path = str(tmp_path / "logan.sock")
+    unix_server = create_server(server.app, unix_socket=socket_path)
+    threading.Thread(target=unix_server.run, daemon=True).start()
+    try:
+        transport = UnixSocketTransport(socket_path)
+        transport.send_batch([{"message": "over uds"}])
+
+        assert transport.stats()["sent"] == 1
+        assert b'"message": "over uds"' in b"".join(subscriber.wait(timeout=2))
+        transport.close()
+    finally:
+        unix_server.close()
+
+
+def _start_server_process(port):
+    from logan.process import ServerProcess
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(("localhost", port))
+    listener.listen(16)
+    server = ServerProcess(port=port, listen_socket=listener)
+    server.run()
+    assert server.wait_ready(timeout=10)
+    return server
+
+
+def test_pooled_connections_are_reused_and_survive_a_server_restart():
+    import requests
+
+    port = _unused_port()
+    url = f"http://localhost:{port}"
+    transport = HttpTransport(url, pool_size=2)
+
+    server = _start_server_process(port)
+    try:
+        for i in range(5):
+            transport.send_batch([{"message": f"before {i}"}])
+        # One keep-alive connection carried every batch
+        pools = transport._session.get_adapter(url).poolmanager.pools
+        assert [pools[key].num_connections for key in pools.keys()] == [1]
+        assert transport.stats()["sent"] == 5
+    finally:
+        server.stop()
+
+    # While the server is down the send fails, the pool is dropped and the batch is buffered
+    transport.send_batch([{"message": "while down"}])
+    stats = transport.stats()
+    assert stats["reconnects"] == 1
+    assert stats["buffered"] == 1 and stats["breaker"]["state"] == CircuitBreaker.CLOSED
+
+    # Same port, new process: the next batch goes out along with the buffered one
+    server = _start_server_process(port)
+    try:
+        transport.send_batch([{"message": "after restart"}])
+
+        stats = transport.stats()
+        assert stats["sent"] == 7 and stats["buffered"] == 0
+        assert requests.get(f"{url}/api/stats", timeout=5).json()["history"]["records"] == 2
+    finally:
+        server.stop()
+        transport.close()